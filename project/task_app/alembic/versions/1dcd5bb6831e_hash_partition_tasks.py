@@ -0,0 +1,69 @@
+"""hash partition tasks
+
+Revision ID: 1dcd5bb6831e
+Revises: 5e1b7a9d03c2
+Create Date: 2026-10-18 13:41:07.120934
+
+Partition count: alembic -x partitions=16 upgrade head, or TASKS_PARTITIONS=16.
+Use task_app.app.database_setup.repartition_tasks to change it later.
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1dcd5bb6831e'
+down_revision: Union[str, Sequence[str], None] = '5e1b7a9d03c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _partitions() -> int:
+    return int(context.get_x_argument(as_dictionary=True).get("partitions") or os.getenv("TASKS_PARTITIONS", 8))
+
+
+def _create_indexes() -> None:
+    op.create_index('idx_tasks_created_at', 'tasks', ['created_at'])
+    op.create_index('uq_tasks_user_id_title', 'tasks', ['user_id', 'title'], unique=True)
+    op.create_index(
+        'idx_tasks_user_id_created_at_id',
+        'tasks',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')]
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    partitions = _partitions()
+    # unique keys on a partitioned table must contain the partition key
+    op.execute("LOCK TABLE tasks IN ACCESS EXCLUSIVE MODE")
+    op.execute(
+        "CREATE TABLE tasks_partitioned (LIKE tasks INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        "PARTITION BY HASH (user_id)"
+    )
+    op.execute("ALTER TABLE tasks_partitioned ADD CONSTRAINT tasks_partitioned_pkey PRIMARY KEY (id, user_id)")
+    for remainder in range(partitions):
+        op.execute(
+            f"CREATE TABLE tasks_p{remainder} PARTITION OF tasks_partitioned "
+            f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})"
+        )
+    op.execute("INSERT INTO tasks_partitioned SELECT * FROM tasks")
+    op.drop_table('tasks')
+    op.rename_table('tasks_partitioned', 'tasks')
+    op.execute("ALTER TABLE tasks RENAME CONSTRAINT tasks_partitioned_pkey TO tasks_pkey")
+    _create_indexes()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("LOCK TABLE tasks IN ACCESS EXCLUSIVE MODE")
+    op.execute("CREATE TABLE tasks_plain (LIKE tasks INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    op.execute("ALTER TABLE tasks_plain ADD CONSTRAINT tasks_plain_pkey PRIMARY KEY (id)")
+    op.execute("INSERT INTO tasks_plain SELECT * FROM tasks")
+    op.drop_table('tasks')
+    op.rename_table('tasks_plain', 'tasks')
+    op.execute("ALTER TABLE tasks RENAME CONSTRAINT tasks_plain_pkey TO tasks_pkey")
+    _create_indexes()
@@ -0,0 +1,38 @@
+"""user created_at list index
+
+Revision ID: 5e1b7a9d03c2
+Revises: c4f43cedb4d2
+Create Date: 2026-10-18 11:04:19.552730
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e1b7a9d03c2'
+down_revision: Union[str, Sequence[str], None] = 'c4f43cedb4d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # matches WHERE user_id = ? ORDER BY created_at DESC, id DESC used by the list endpoints
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_tasks_user_id_created_at_id',
+            'tasks',
+            ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+            postgresql_concurrently=True
+        )
+        op.drop_index('idx_tasks_status', table_name='tasks', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('idx_tasks_status', 'tasks', ['status'], postgresql_concurrently=True)
+        op.drop_index('idx_tasks_user_id_created_at_id', table_name='tasks', postgresql_concurrently=True)
@@ -0,0 +1,85 @@
+"""task counters
+
+Revision ID: 740efa1608bd
+Revises: 1dcd5bb6831e
+Create Date: 2026-10-18 15:22:53.804116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '740efa1608bd'
+down_revision: Union[str, Sequence[str], None] = '1dcd5bb6831e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('task_counters',
+    sa.Column('user_id', sa.String(length=255), nullable=False),
+    sa.Column('status', sa.String(length=11), nullable=False),
+    sa.Column('task_count', sa.BigInteger(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('user_id', 'status')
+    )
+
+    # statement-level, so a bulk insert/update/delete costs one upsert per (user_id, status)
+    op.execute("""
+        CREATE FUNCTION task_counters_apply() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO task_counters (user_id, status, task_count)
+                SELECT user_id, status, count(*) FROM new_rows
+                GROUP BY user_id, status ORDER BY user_id, status
+                ON CONFLICT (user_id, status) DO UPDATE SET task_count = task_counters.task_count + EXCLUDED.task_count;
+            ELSIF TG_OP = 'DELETE' THEN
+                INSERT INTO task_counters (user_id, status, task_count)
+                SELECT user_id, status, -count(*) FROM old_rows
+                GROUP BY user_id, status ORDER BY user_id, status
+                ON CONFLICT (user_id, status) DO UPDATE SET task_count = task_counters.task_count + EXCLUDED.task_count;
+            ELSE
+                INSERT INTO task_counters (user_id, status, task_count)
+                SELECT user_id, status, sum(delta) FROM (
+                    SELECT user_id, status, 1 AS delta FROM new_rows
+                    UNION ALL
+                    SELECT user_id, status, -1 AS delta FROM old_rows
+                ) changes
+                GROUP BY user_id, status HAVING sum(delta) <> 0 ORDER BY user_id, status
+                ON CONFLICT (user_id, status) DO UPDATE SET task_count = task_counters.task_count + EXCLUDED.task_count;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """)
+
+    # no writes may slip in between the triggers going live and the backfill
+    op.execute("LOCK TABLE tasks IN SHARE ROW EXCLUSIVE MODE")
+    op.execute(
+        "CREATE TRIGGER task_counters_insert AFTER INSERT ON tasks "
+        "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION task_counters_apply()"
+    )
+    op.execute(
+        "CREATE TRIGGER task_counters_update AFTER UPDATE ON tasks "
+        "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION task_counters_apply()"
+    )
+    op.execute(
+        "CREATE TRIGGER task_counters_delete AFTER DELETE ON tasks "
+        "REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION task_counters_apply()"
+    )
+    op.execute(
+        "INSERT INTO task_counters (user_id, status, task_count) "
+        "SELECT user_id, status, count(*) FROM tasks GROUP BY user_id, status"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER task_counters_delete ON tasks")
+    op.execute("DROP TRIGGER task_counters_update ON tasks")
+    op.execute("DROP TRIGGER task_counters_insert ON tasks")
+    op.execute("DROP FUNCTION task_counters_apply()")
+    op.drop_table('task_counters')
@@ -0,0 +1,48 @@
+"""partial status list indexes
+
+Revision ID: 77457ffed21f
+Revises: 740efa1608bd
+Create Date: 2026-10-18 17:05:36.447812
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '77457ffed21f'
+down_revision: Union[str, Sequence[str], None] = '740efa1608bd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# the open statuses dashboards poll; completed/rejected use idx_tasks_user_id_created_at_id
+PARTIAL_INDEXES = {
+    'idx_tasks_user_pending': 'pending',
+    'idx_tasks_user_in_progress': 'in_progress',
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY is not allowed on a partitioned parent: declare the index
+    # on the parent only, build it per partition, then attach each piece
+    partitions = op.get_bind().execute(sa.text(
+        "SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = 'tasks'::regclass ORDER BY 1"
+    )).scalars().all()
+    with op.get_context().autocommit_block():
+        for name, task_status in PARTIAL_INDEXES.items():
+            columns = "(user_id, created_at DESC, id DESC)"
+            where = f"WHERE status = '{task_status}'"
+            op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON ONLY tasks {columns} {where}")
+            for partition in partitions:
+                partition_index = f"{partition}_{task_status}_idx"
+                op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {partition_index} ON {partition} {columns} {where}")
+                op.execute(f"ALTER INDEX {name} ATTACH PARTITION {partition_index}")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in PARTIAL_INDEXES:
+        op.drop_index(name, table_name='tasks')
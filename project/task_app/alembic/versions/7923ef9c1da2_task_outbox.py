@@ -0,0 +1,36 @@
+"""task outbox
+
+Revision ID: 7923ef9c1da2
+Revises: e3f7c68dc3ea
+Create Date: 2026-10-18 17:15:18.135186
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '7923ef9c1da2'
+down_revision: Union[str, Sequence[str], None] = 'e3f7c68dc3ea'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('task_outbox',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('event_type', sa.String(length=50), nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # rows live for about a second; vacuum the dead tuples before they pile up
+    op.execute("ALTER TABLE task_outbox SET (autovacuum_vacuum_scale_factor = 0, autovacuum_vacuum_threshold = 1000)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('task_outbox')
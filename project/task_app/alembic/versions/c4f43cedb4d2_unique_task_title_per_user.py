@@ -0,0 +1,46 @@
+"""unique task title per user
+
+Revision ID: c4f43cedb4d2
+Revises: 833d82111c94
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f43cedb4d2'
+down_revision: Union[str, Sequence[str], None] = '833d82111c94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT user_id, title FROM tasks GROUP BY user_id, title HAVING count(*) > 1 LIMIT 10"
+    )).all()
+    if duplicates:
+        raise RuntimeError(
+            "Duplicate task titles must be resolved before adding uq_tasks_user_id_title: "
+            + ", ".join(f"{user_id}/{title}" for user_id, title in duplicates)
+        )
+
+    # built without blocking writes; create_task relies on it for ON CONFLICT
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_tasks_user_id_title',
+            'tasks',
+            ['user_id', 'title'],
+            unique=True,
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('uq_tasks_user_id_title', table_name='tasks', postgresql_concurrently=True)
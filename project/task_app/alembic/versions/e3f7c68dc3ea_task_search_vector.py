@@ -0,0 +1,52 @@
+"""task search vector
+
+Revision ID: e3f7c68dc3ea
+Revises: 77457ffed21f
+Create Date: 2026-10-18 19:12:08.903155
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3f7c68dc3ea'
+down_revision: Union[str, Sequence[str], None] = '77457ffed21f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # adding a stored generated column rewrites every partition under an exclusive lock
+    op.add_column('tasks', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+            persisted=True
+        )
+    ))
+
+    # same per-partition CONCURRENTLY build as the partial status indexes
+    partitions = op.get_bind().execute(sa.text(
+        "SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = 'tasks'::regclass ORDER BY 1"
+    )).scalars().all()
+    with op.get_context().autocommit_block():
+        op.execute("CREATE INDEX IF NOT EXISTS idx_tasks_search_vector ON ONLY tasks USING gin (search_vector)")
+        for partition in partitions:
+            partition_index = f"{partition}_search_vector_idx"
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {partition_index} ON {partition} USING gin (search_vector)"
+            )
+            op.execute(f"ALTER INDEX idx_tasks_search_vector ATTACH PARTITION {partition_index}")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_tasks_search_vector', table_name='tasks')
+    op.drop_column('tasks', 'search_vector')
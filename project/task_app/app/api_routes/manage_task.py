@@ -1,18 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
 from fastapi_utils.cbv import cbv
 from sqlalchemy.orm import Session
 from sqlalchemy import text
+from datetime import datetime
 from uuid import UUID
+from typing import Optional, Union
 from fastapi import HTTPException, status
 from task_app.app.database_setup.db_session import get_db
-from task_app.app.services_config.redis_config import get_cache, set_cache, rate_limiter
+from task_app.app.services_config.redis_config import get_or_set_cache, tasks_cache_key, tasks_etag, etag_matches, rate_limiter
 from task_app.app.services_config.rbac_keycloack import require_role
-from task_app.app.task_operations.task_service import create_task,get_task,get_tasks,update_task,delete_task
+from task_app.app.services_config.config import TASKS_CACHE_TTL
+from task_app.app.task_operations.task_service import create_task,get_task,get_tasks,get_tasks_by_cursor,update_task,delete_task
+from task_app.app.api_routes.responses import dump_json, json_response, not_modified, task_payload
 from task_app.app.database_setup import schemas
 from sqlalchemy.exc import SQLAlchemyError
 router = APIRouter(tags=["Tasks"])
 
-
 @cbv(router)
 class TaskAPI:
     """
@@ -55,47 +58,92 @@ class TaskAPI:
 
     @router.get(
     "/tasks",
-    response_model=schemas.PaginatedTasks,
+    response_model=Union[schemas.PaginatedTasks, schemas.CursorPaginatedTasks],
     status_code=status.HTTP_200_OK
 )
     def list_tasks(
         self,
         page: int = Query(1, ge=1),
         page_size: int = Query(10, ge=1, le=100),
+        cursor: Optional[str] = Query(
+            None,
+            description="Opaque keyset cursor. Pass an empty value to start cursor pagination."
+        ),
+        task_status: Optional[schemas.StatusEnum] = Query(None, alias="status"),
+        created_after: Optional[datetime] = Query(None),
+        created_before: Optional[datetime] = Query(None),
+        sort: schemas.TaskSort = Query(schemas.TaskSort.newest),
+        if_none_match: Optional[str] = Header(None),
         user=Depends(require_role("admin", "user")),
-        _=Depends(rate_limiter)
+        limits=Depends(rate_limiter)
     ):
-        cache_key = f"user:{user.username}:tasks:{page}:{page_size}"
-        try:
-            cached_data = get_cache(cache_key)
-            if cached_data:
-                print(cached_data,'cached_data')
+        task_filter = None
+        if task_status is not None or created_after is not None or created_before is not None:
+            task_filter = schemas.TaskFilter(status=task_status, created_after=created_after, created_before=created_before)
+        # every filter value is part of the key, so filtered pages never collide
+        filter_parts = (task_status.value if task_status else None, created_after, created_before, sort.value)
 
-                return cached_data
+        if cursor is not None:
+            return self._list_tasks_by_cursor(cursor, page_size, user, task_filter, sort, filter_parts, if_none_match, limits.generation)
 
+        def load_page():
             total, items = get_tasks(
                 self.db,
                 page=page,
                 page_size=page_size,
-                user=user.username
+                user=user.username,
+                task_filter=task_filter,
+                sort=sort
             )
+            return dump_json({
+                "total": total,
+                "page": page,
+                "page_size": page_size,
+                "items": [task_payload(task) for task in items]
+            })
 
-            response = schemas.PaginatedTasks(
-                total=total,
-                page=page,
-                page_size=page_size,
-                items=items
-            )
+        try:
+            cache_key = tasks_cache_key(user.username, page, page_size, *filter_parts, generation=limits.generation)
+            etag = tasks_etag(cache_key)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+            return json_response(get_or_set_cache(cache_key, load_page, ttl=TASKS_CACHE_TTL), etag)
 
-            response_dict = response.model_dump()
+        except Exception as e:
+            print(e)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to fetch tasks"
+            )
 
-            for item in response_dict.get("items", []):
-                if isinstance(item.get("id"), UUID):
-                    item["id"] = str(item["id"])
+    def _list_tasks_by_cursor(self, cursor: str, page_size: int, user, task_filter, sort, filter_parts, if_none_match, generation):
+        def load_page():
+            items, next_cursor = get_tasks_by_cursor(
+                self.db,
+                page_size=page_size,
+                cursor=cursor,
+                user=user.username,
+                task_filter=task_filter,
+                sort=sort
+            )
+            return dump_json({
+                "page_size": page_size,
+                "next_cursor": next_cursor,
+                "items": [task_payload(task) for task in items]
+            })
 
-            set_cache(cache_key, response_dict, ttl=60)
+        try:
+            cache_key = tasks_cache_key(user.username, "cursor", cursor, page_size, *filter_parts, generation=generation)
+            etag = tasks_etag(cache_key)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+            return json_response(get_or_set_cache(cache_key, load_page, ttl=TASKS_CACHE_TTL), etag)
 
-            return response
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
 
         except Exception as e:
             print(e)
@@ -112,8 +160,9 @@ class TaskAPI:
     def get_task(
         self,
         id: UUID,
+        if_none_match: Optional[str] = Header(None),
         user=Depends(require_role("admin", "user")),
-        _=Depends(rate_limiter)
+        limits=Depends(rate_limiter)
     ):
         try:
             task = get_task(
@@ -128,7 +177,11 @@ class TaskAPI:
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Task not found"
                 )
-            return task
+
+            etag = tasks_etag(tasks_cache_key(user.username, "task", id, generation=limits.generation))
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+            return json_response(dump_json(task_payload(task)), etag)
         except HTTPException:
             raise
         except SQLAlchemyError:
@@ -177,6 +230,11 @@ class TaskAPI:
             )
         except HTTPException:
             raise
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
         except SQLAlchemyError:
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
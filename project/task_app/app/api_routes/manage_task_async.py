@@ -0,0 +1,293 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi_utils.cbv import cbv
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from uuid import UUID
+from typing import Optional, Union
+from task_app.app.database_setup.db_session import get_async_db
+from task_app.app.services_config.redis_config import async_get_cache, async_set_cache, async_tasks_cache_key, tasks_etag, etag_matches, async_rate_limiter
+from task_app.app.services_config.rbac_keycloack import require_role
+from task_app.app.services_config.config import TASKS_CACHE_TTL
+from task_app.app.task_operations.async_task_service import create_task,get_task,get_tasks,get_tasks_by_cursor,update_task,delete_task
+from task_app.app.api_routes.responses import dump_json, json_response, not_modified, task_payload
+from task_app.app.database_setup import schemas
+from sqlalchemy.exc import SQLAlchemyError
+router = APIRouter(tags=["Tasks"])
+
+
+@cbv(router)
+class TaskAsyncAPI:
+    """
+    Task-related APIs on AsyncSession (Class Based View).
+    Mirrors TaskAPI; enabled with DB_MODE=async.
+    """
+
+    db: AsyncSession = Depends(get_async_db)
+
+    @router.post(
+        "/tasks",
+        response_model=schemas.TaskOut,
+        status_code=status.HTTP_201_CREATED
+    )
+    async def create_task(
+        self,
+        task_in: schemas.TaskCreate,
+        user=Depends(require_role("admin", "user")),
+        _=Depends(async_rate_limiter)
+    ):
+        try:
+            return await create_task(
+                self.db,
+                task_in,
+                user.username
+            )
+
+        except ValueError as e:
+            print(e)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+
+        except Exception as e:
+            print(e)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to create task"
+            )
+
+    @router.get(
+    "/tasks",
+    response_model=Union[schemas.PaginatedTasks, schemas.CursorPaginatedTasks],
+    status_code=status.HTTP_200_OK
+)
+    async def list_tasks(
+        self,
+        page: int = Query(1, ge=1),
+        page_size: int = Query(10, ge=1, le=100),
+        cursor: Optional[str] = Query(
+            None,
+            description="Opaque keyset cursor. Pass an empty value to start cursor pagination."
+        ),
+        task_status: Optional[schemas.StatusEnum] = Query(None, alias="status"),
+        created_after: Optional[datetime] = Query(None),
+        created_before: Optional[datetime] = Query(None),
+        sort: schemas.TaskSort = Query(schemas.TaskSort.newest),
+        if_none_match: Optional[str] = Header(None),
+        user=Depends(require_role("admin", "user")),
+        limits=Depends(async_rate_limiter)
+    ):
+        task_filter = None
+        if task_status is not None or created_after is not None or created_before is not None:
+            task_filter = schemas.TaskFilter(status=task_status, created_after=created_after, created_before=created_before)
+        # every filter value is part of the key, so filtered pages never collide
+        filter_parts = (task_status.value if task_status else None, created_after, created_before, sort.value)
+
+        if cursor is not None:
+            return await self._list_tasks_by_cursor(cursor, page_size, user, task_filter, sort, filter_parts, if_none_match, limits.generation)
+
+        try:
+            cache_key = await async_tasks_cache_key(user.username, page, page_size, *filter_parts, generation=limits.generation)
+            etag = tasks_etag(cache_key)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+            cached_body = await async_get_cache(cache_key)
+            if cached_body:
+                return json_response(cached_body, etag)
+
+            total, items = await get_tasks(
+                self.db,
+                page=page,
+                page_size=page_size,
+                user=user.username,
+                task_filter=task_filter,
+                sort=sort
+            )
+
+            body = dump_json({
+                "total": total,
+                "page": page,
+                "page_size": page_size,
+                "items": [task_payload(task) for task in items]
+            })
+
+            await async_set_cache(cache_key, body, TASKS_CACHE_TTL)
+
+            return json_response(body, etag)
+
+        except Exception as e:
+            print(e)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to fetch tasks"
+            )
+
+    async def _list_tasks_by_cursor(self, cursor: str, page_size: int, user, task_filter, sort, filter_parts, if_none_match, generation):
+        try:
+            cache_key = await async_tasks_cache_key(user.username, "cursor", cursor, page_size, *filter_parts, generation=generation)
+            etag = tasks_etag(cache_key)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+            cached_body = await async_get_cache(cache_key)
+            if cached_body:
+                return json_response(cached_body, etag)
+
+            items, next_cursor = await get_tasks_by_cursor(
+                self.db,
+                page_size=page_size,
+                cursor=cursor,
+                user=user.username,
+                task_filter=task_filter,
+                sort=sort
+            )
+
+            body = dump_json({
+                "page_size": page_size,
+                "next_cursor": next_cursor,
+                "items": [task_payload(task) for task in items]
+            })
+
+            await async_set_cache(cache_key, body, TASKS_CACHE_TTL)
+
+            return json_response(body, etag)
+
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+
+        except Exception as e:
+            print(e)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to fetch tasks"
+            )
+
+    @router.get(
+    "/tasks/{id}",
+    response_model=schemas.TaskOut,
+    status_code=status.HTTP_200_OK
+)
+    async def get_task(
+        self,
+        id: UUID,
+        if_none_match: Optional[str] = Header(None),
+        user=Depends(require_role("admin", "user")),
+        limits=Depends(async_rate_limiter)
+    ):
+        try:
+            task = await get_task(
+                self.db,
+                id,
+                user
+            )
+            if task is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Task not found"
+                )
+
+            etag = tasks_etag(await async_tasks_cache_key(user.username, "task", id, generation=limits.generation))
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+            return json_response(dump_json(task_payload(task)), etag)
+        except HTTPException:
+            raise
+        except SQLAlchemyError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Database service unavailable"
+            )
+
+        except Exception as e:
+            print(e)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to fetch task"
+            )
+
+    @router.patch(
+    "/tasks/{id}",
+    response_model=schemas.TaskOut,
+    status_code=status.HTTP_200_OK
+)
+    async def update_task(
+        self,
+        id: UUID,
+        updates: schemas.TaskUpdate,
+        user=Depends(require_role("admin", "user")),
+        _=Depends(async_rate_limiter)
+    ):
+        try:
+            task = await update_task(
+                self.db,
+                id,
+                updates,
+                user
+            )
+
+            if not task:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Task not found"
+                )
+
+            return task
+        except HTTPException:
+            raise
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        except SQLAlchemyError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Database service unavailable"
+            )
+        except Exception:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to update task"
+            )
+
+    @router.delete(
+    "/tasks/{id}",
+    status_code=status.HTTP_204_NO_CONTENT
+)
+    async def delete_task(
+        self,
+        id: UUID,
+        user=Depends(require_role("admin")),
+        _=Depends(async_rate_limiter)
+    ):
+        try:
+            task = await get_task(
+                self.db,
+                id,
+                user
+            )
+
+            if not task:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Task not found"
+                )
+
+            await delete_task(self.db, task)
+            return None
+        except HTTPException:
+            raise
+
+        except SQLAlchemyError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Database service unavailable"
+            )
+
+        except Exception:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to delete task"
+            )
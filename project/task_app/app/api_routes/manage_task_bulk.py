@@ -0,0 +1,304 @@
+import csv
+import hashlib
+import io
+import json
+from typing import Literal, Optional
+from fastapi import APIRouter, Body, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi.responses import StreamingResponse
+from fastapi_utils.cbv import cbv
+from sqlalchemy.orm import Session
+from task_app.app.database_setup.db_session import get_db
+from task_app.app.services_config.redis_config import get_or_set_cache, rate_limit, rate_limiter, tasks_cache_key
+from task_app.app.services_config.rbac_keycloack import require_role
+from task_app.app.services_config.config import BULK_MAX_ITEMS, BULK_RATE_LIMIT_COST, EXPORT_BATCH_SIZE, TASKS_CACHE_TTL
+from task_app.app.task_operations.task_import import import_tasks
+from task_app.app.task_operations.task_service import create_tasks_bulk, update_tasks_bulk, delete_tasks_bulk, stream_tasks, get_task_counts, search_tasks, EXPORT_COLUMNS
+from task_app.app.api_routes.responses import dump_json, json_response, task_payload
+from task_app.app.database_setup import schemas
+from sqlalchemy.exc import SQLAlchemyError
+router = APIRouter(tags=["Tasks"])
+
+
+def _ndjson_chunks(batches):
+    for rows in batches:
+        yield "".join(
+            json.dumps({
+                "id": str(row.id),
+                "title": row.title,
+                "description": row.description,
+                "status": row.status.value,
+                "created_at": row.created_at.isoformat(),
+                "updated_at": row.updated_at.isoformat(),
+            }) + "\n"
+            for row in rows
+        )
+
+
+def _csv_chunks(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for rows in batches:
+        writer.writerows(
+            (row.id, row.title, row.description, row.status.value, row.created_at.isoformat(), row.updated_at.isoformat())
+            for row in rows
+        )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+@cbv(router)
+class TaskBulkAPI:
+    """
+    Bulk and aggregate task APIs (Class Based View).
+    Included ahead of TaskAPI so /tasks/bulk, /tasks/stats etc. are not captured by /tasks/{id}.
+    """
+
+    db: Session = Depends(get_db)
+
+    @router.post(
+        "/tasks/bulk",
+        response_model=schemas.BulkTaskCreateResult,
+        status_code=status.HTTP_200_OK
+    )
+    def create_tasks(
+        self,
+        tasks_in: list[schemas.TaskCreate] = Body(..., min_length=1, max_length=BULK_MAX_ITEMS),
+        user=Depends(require_role("admin", "user")),
+        _=Depends(rate_limit(BULK_RATE_LIMIT_COST))
+    ):
+        try:
+            results = create_tasks_bulk(
+                self.db,
+                tasks_in,
+                user.username
+            )
+            created = sum(1 for result in results if result["status"] == "created")
+            return schemas.BulkTaskCreateResult(
+                created=created,
+                duplicates=len(results) - created,
+                results=results
+            )
+
+        except SQLAlchemyError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Database service unavailable"
+            )
+
+        except Exception as e:
+            print(e)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to create tasks"
+            )
+
+    @router.patch(
+        "/tasks/bulk",
+        response_model=schemas.BulkTaskChangeResult,
+        status_code=status.HTTP_200_OK
+    )
+    def update_tasks(
+        self,
+        updates: schemas.BulkTaskUpdate,
+        user=Depends(require_role("admin", "user")),
+        _=Depends(rate_limit(BULK_RATE_LIMIT_COST))
+    ):
+        try:
+            task_ids = update_tasks_bulk(
+                self.db,
+                updates,
+                user.username
+            )
+            return schemas.BulkTaskChangeResult(count=len(task_ids), ids=task_ids)
+
+        except SQLAlchemyError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Database service unavailable"
+            )
+
+        except Exception as e:
+            print(e)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to update tasks"
+            )
+
+    @router.delete(
+        "/tasks/bulk",
+        response_model=schemas.BulkTaskChangeResult,
+        status_code=status.HTTP_200_OK
+    )
+    def delete_tasks(
+        self,
+        selection: schemas.BulkTaskSelection,
+        user=Depends(require_role("admin")),
+        _=Depends(rate_limit(BULK_RATE_LIMIT_COST))
+    ):
+        try:
+            task_ids = delete_tasks_bulk(
+                self.db,
+                selection,
+                user.username
+            )
+            return schemas.BulkTaskChangeResult(count=len(task_ids), ids=task_ids)
+
+        except SQLAlchemyError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Database service unavailable"
+            )
+
+        except Exception as e:
+            print(e)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to delete tasks"
+            )
+
+    @router.get(
+        "/tasks/export",
+        status_code=status.HTTP_200_OK,
+        response_class=StreamingResponse
+    )
+    def export_tasks(
+        self,
+        format: Literal["ndjson", "csv"] = Query("ndjson"),
+        user=Depends(require_role("admin", "user")),
+        _=Depends(rate_limit(BULK_RATE_LIMIT_COST))
+    ):
+        batches = stream_tasks(user.username, batch_size=EXPORT_BATCH_SIZE)
+        if format == "csv":
+            return StreamingResponse(
+                _csv_chunks(batches),
+                media_type="text/csv",
+                headers={"Content-Disposition": 'attachment; filename="tasks.csv"'}
+            )
+        return StreamingResponse(
+            _ndjson_chunks(batches),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": 'attachment; filename="tasks.ndjson"'}
+        )
+
+    @router.get(
+        "/tasks/search",
+        response_model=schemas.TaskSearchResults,
+        status_code=status.HTTP_200_OK
+    )
+    def search_tasks(
+        self,
+        q: str = Query(..., min_length=1, max_length=256, description="Words, \"quoted phrases\", OR and -excluded words"),
+        page_size: int = Query(10, ge=1, le=100),
+        cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+        user=Depends(require_role("admin", "user")),
+        limits=Depends(rate_limiter)
+    ):
+        def load_page():
+            rows, next_cursor = search_tasks(self.db, user.username, q, page_size=page_size, cursor=cursor)
+            return dump_json({
+                "page_size": page_size,
+                "next_cursor": next_cursor,
+                "items": [{**task_payload(row.Task), "rank": row.rank} for row in rows]
+            })
+
+        try:
+            query_hash = hashlib.sha1(q.encode()).hexdigest()
+            cache_key = tasks_cache_key(user.username, "search", query_hash, cursor or "", page_size, generation=limits.generation)
+            return json_response(get_or_set_cache(cache_key, load_page, ttl=TASKS_CACHE_TTL))
+
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+
+        except SQLAlchemyError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Database service unavailable"
+            )
+
+        except Exception as e:
+            print(e)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to search tasks"
+            )
+
+    @router.get(
+        "/tasks/stats",
+        response_model=schemas.TaskStats,
+        status_code=status.HTTP_200_OK
+    )
+    def task_stats(
+        self,
+        user=Depends(require_role("admin", "user")),
+        _=Depends(rate_limiter)
+    ):
+        try:
+            counts = get_task_counts(self.db, user.username)
+            by_status = {task_status: counts.get(task_status.value, 0) for task_status in schemas.StatusEnum}
+            return schemas.TaskStats(total=sum(by_status.values()), by_status=by_status)
+
+        except SQLAlchemyError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Database service unavailable"
+            )
+
+        except Exception as e:
+            print(e)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to fetch task stats"
+            )
+
+    @router.post(
+        "/tasks/import",
+        response_model=schemas.TaskImportResult,
+        status_code=status.HTTP_200_OK
+    )
+    def import_tasks(
+        self,
+        file: UploadFile = File(...),
+        format: Optional[Literal["csv", "ndjson"]] = Query(None, description="Defaults to the uploaded file extension"),
+        user=Depends(require_role("admin", "user")),
+        _=Depends(rate_limit(BULK_RATE_LIMIT_COST))
+    ):
+        if format is None:
+            format = "csv" if (file.filename or "").endswith(".csv") else "ndjson"
+
+        stream = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+        try:
+            return import_tasks(
+                self.db,
+                stream,
+                format,
+                user.username
+            )
+
+        except UnicodeDecodeError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Import file must be UTF-8 encoded"
+            )
+
+        except SQLAlchemyError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Database service unavailable"
+            )
+
+        except Exception as e:
+            print(e)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to import tasks"
+            )
+
+        finally:
+            stream.detach()
@@ -0,0 +1,31 @@
+"""
+Response helpers shared by the task routers. Task pages are cached as
+ready-to-send JSON bytes, so cache hits and 304s never run Pydantic.
+"""
+import orjson
+from fastapi import Response, status
+
+# per-user data: browsers may keep it but must revalidate with If-None-Match
+ETAG_CACHE_CONTROL = "private, no-cache"
+
+
+def task_payload(task) -> dict:
+    """The TaskOut fields read straight off a Task row; orjson encodes UUIDs and enums itself"""
+    return {"id": task.id, "title": task.title, "description": task.description, "status": task.status}
+
+
+def dump_json(payload) -> bytes:
+    # asyncpg hands back its own UUID subclass, which orjson only encodes via default
+    return orjson.dumps(payload, default=str)
+
+
+def json_response(body: bytes, etag: str | None = None) -> Response:
+    headers = {"ETag": etag, "Cache-Control": ETAG_CACHE_CONTROL} if etag else None
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": ETAG_CACHE_CONTROL}
+    )
@@ -1,19 +1,169 @@
 # task_app/app/tasks/email_tasks.py
 from ..celery_app import celery
+import json
+import logging
+import os
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from redis.exceptions import LockError
+from task_app.app.services_config.redis_config import redis_client
 from task_app.app.services_config.config import *
 
-@celery.task
-def send_email_notification(subject: str, body: str, to_email: str):
+logger = logging.getLogger(__name__)
+
+SMTP_HOST = os.getenv("SMTP_HOST", SMTP_HOST)
+SMTP_PORT = int(os.getenv("SMTP_PORT", SMTP_PORT))
+SMTP_USE_SSL = os.getenv("SMTP_USE_SSL", str(SMTP_USE_SSL)).lower() in ("1", "true", "yes")
+
+# connection-level failures: reconnect once, then leave the rest of the batch for a retry
+_CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError)
+
+
+class SMTPSender:
+    """
+    One authenticated SMTP connection per worker process, reused across batches.
+    It is checked with NOOP before each batch and re-opened when a send finds it dropped.
+    """
+
+    def __init__(self):
+        self._server = None
+
+    def _connect(self):
+        if SMTP_USE_SSL:
+            server = smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+            server.ehlo()
+        else:
+            server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+            server.ehlo()
+            if server.has_extn("starttls"):
+                server.starttls()
+                server.ehlo()
+        # local stand-ins usually do not offer AUTH
+        if server.has_extn("auth"):
+            server.login(GMAIL_USER, GMAIL_APP_PASSWORD)
+        return server
+
+    def open(self):
+        if self._server is not None:
+            try:
+                if self._server.noop()[0] == 250:
+                    return
+            except _CONNECTION_ERRORS:
+                pass
+            self.close()
+        self._server = self._connect()
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                self._server.close()
+            self._server = None
+
+    def send(self, message: MIMEMultipart):
+        if self._server is None:
+            self.open()
+        try:
+            self._server.send_message(message)
+        except _CONNECTION_ERRORS:
+            self.close()
+            self.open()
+            self._server.send_message(message)
+
+
+_sender = SMTPSender()
+
+
+def _build_message(notification: dict) -> MIMEMultipart:
     message = MIMEMultipart()
     message["From"] = GMAIL_USER
-    message["To"] = to_email
-    message["Subject"] = subject
-    message.attach(MIMEText(body, "plain"))
+    message["To"] = notification["to_email"]
+    message["Subject"] = notification["subject"]
+    message.attach(MIMEText(notification["body"], "plain"))
+    return message
+
+
+def queue_email_notifications(notifications: list[dict]):
+    """
+    Append notifications ({"subject", "body", "to_email"}) to the batch queue
+    in one round trip. A push that completes a batch schedules a flush right
+    away instead of waiting for the EMAIL_BATCH_WINDOW beat.
+    """
+    if not notifications:
+        return
+    pending = redis_client.rpush(EMAIL_QUEUE_KEY, *map(json.dumps, notifications))
+    if pending // EMAIL_BATCH_SIZE > (pending - len(notifications)) // EMAIL_BATCH_SIZE:
+        flush_email_notifications.delay()
+
+
+def _is_temporary(exc: smtplib.SMTPException) -> bool:
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return any(400 <= code < 500 for code, _ in exc.recipients.values())
+    return 400 <= exc.smtp_code < 500
+
+
+def _send_queued(raw: str):
+    """
+    Messages the server rejects permanently are logged and dropped so they
+    cannot block the queue; connection and temporary (4xx) errors propagate.
+    """
+    try:
+        _sender.send(_build_message(json.loads(raw)))
+    except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as exc:
+        if _is_temporary(exc):
+            raise
+        logger.error("Dropping undeliverable notification: %s", exc)
+    except (ValueError, KeyError) as exc:
+        logger.error("Dropping malformed notification %r: %s", raw, exc)
 
-    with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-        server.login(GMAIL_USER, GMAIL_APP_PASSWORD)
-        server.sendmail(GMAIL_USER, to_email, message.as_string())
 
+@celery.task(bind=True, max_retries=EMAIL_SEND_RETRIES)
+def flush_email_notifications(self) -> int:
+    """
+    Drain the notification queue in batches of EMAIL_BATCH_SIZE over the
+    worker's persistent SMTP connection. A Redis lock keeps a single flusher,
+    and messages are only removed from the queue once handed to the server,
+    so a crash or SMTP outage re-sends rather than loses them.
+    """
+    lock = redis_client.lock(f"{EMAIL_QUEUE_KEY}:flush", timeout=EMAIL_FLUSH_LOCK_TTL, blocking=False)
+    if not lock.acquire():
+        return 0
+
+    sent = 0
+    try:
+        while True:
+            batch = redis_client.lrange(EMAIL_QUEUE_KEY, 0, EMAIL_BATCH_SIZE - 1)
+            if not batch:
+                return sent
+            handled = 0
+            try:
+                _sender.open()
+                for raw in batch:
+                    _send_queued(raw)
+                    handled += 1
+            finally:
+                if handled:
+                    redis_client.ltrim(EMAIL_QUEUE_KEY, handled, -1)
+                    sent += handled
+            if len(batch) < EMAIL_BATCH_SIZE:
+                return sent
+            lock.reacquire()
+
+    except (smtplib.SMTPException, OSError) as exc:
+        _sender.close()
+        logger.warning("Email batch interrupted after %s messages: %s", sent, exc)
+        raise self.retry(exc=exc, countdown=min(60, 2 ** self.request.retries))
+
+    finally:
+        try:
+            lock.release()
+        except LockError:
+            pass
+
+
+@celery.task
+def send_email_notification(subject: str, body: str, to_email: str):
+    """Kept so messages already on the broker before batching still get delivered"""
+    queue_email_notifications([{"subject": subject, "body": body, "to_email": to_email}])
@@ -0,0 +1,60 @@
+from ..celery_app import celery
+from sqlalchemy import delete, select
+from task_app.app.bg_tasks.email_tasks import queue_email_notifications
+from task_app.app.database_setup import models
+from task_app.app.database_setup.database import SessionLocal
+from task_app.app.task_operations.task_service import OUTBOX_EMAIL, TASK_EVENT_TYPES
+from task_app.app.stream_app import stream
+from task_app.app.services_config.config import *
+
+
+def _dispatch(rows):
+    """Hand one batch of outbox rows to their consumers; raising keeps the rows"""
+    events = [row for row in rows if row.event_type in TASK_EVENT_TYPES]
+    if events:
+        stream.publish(events)
+    queue_email_notifications([row.payload for row in rows if row.event_type == OUTBOX_EMAIL])
+
+
+def relay_batch(db) -> int:
+    """
+    Claim, dispatch and delete up to OUTBOX_BATCH_SIZE rows in one transaction.
+    SKIP LOCKED lets several relays drain side by side, and a failed dispatch
+    rolls the delete back so the rows are retried (at-least-once delivery).
+    """
+    with db.begin():
+        claimed = (
+            select(models.TaskOutbox.id)
+            .order_by(models.TaskOutbox.id)
+            .limit(OUTBOX_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        rows = db.execute(
+            delete(models.TaskOutbox)
+            .where(models.TaskOutbox.id.in_(claimed))
+            .returning(
+                models.TaskOutbox.id,
+                models.TaskOutbox.event_type,
+                models.TaskOutbox.payload,
+                models.TaskOutbox.created_at
+            )
+        ).all()
+        rows.sort(key=lambda row: row.id)
+        if rows:
+            _dispatch(rows)
+    return len(rows)
+
+
+@celery.task
+def relay_outbox() -> int:
+    """Drain task_outbox until it is empty or another relay holds the remaining rows"""
+    relayed = 0
+    db = SessionLocal()
+    try:
+        while True:
+            count = relay_batch(db)
+            relayed += count
+            if count < OUTBOX_BATCH_SIZE:
+                return relayed
+    finally:
+        db.close()
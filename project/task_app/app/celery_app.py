@@ -15,5 +15,16 @@ celery.conf.update(
     timezone='Asia/Kolkata',    
     enable_utc=True,
 )
-celery.autodiscover_tasks(packages=["task_app.app.bg_tasks.email_tasks"])
+# run `celery -A task_app.app.celery_app beat` next to the workers to drive the periodic tasks
+celery.conf.beat_schedule = {
+    "flush-email-notifications": {
+        "task": "task_app.app.bg_tasks.email_tasks.flush_email_notifications",
+        "schedule": EMAIL_BATCH_WINDOW,
+    },
+    "relay-task-outbox": {
+        "task": "task_app.app.bg_tasks.outbox_relay.relay_outbox",
+        "schedule": OUTBOX_RELAY_INTERVAL,
+    },
+}
+celery.autodiscover_tasks(packages=["task_app.app.bg_tasks.email_tasks", "task_app.app.bg_tasks.outbox_relay"])
 
@@ -1,11 +1,14 @@
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, scoped_session
 from dotenv import load_dotenv
-from ..services_config.config import DATABASE_URL
+from ..services_config.config import DATABASE_URL, DB_MODE
 
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL",DATABASE_URL)
+DB_MODE = os.getenv("DB_MODE", DB_MODE)
 engine = create_engine(
     DATABASE_URL,
     pool_size=10,
@@ -16,3 +19,22 @@ engine = create_engine(
 )
 
 SessionLocal = scoped_session(sessionmaker(autocommit=False,autoflush=False,bind=engine))
+
+
+async_engine = None
+AsyncSessionLocal = None
+
+if DB_MODE == "async":
+    ASYNC_DATABASE_URL = os.getenv(
+        "ASYNC_DATABASE_URL",
+        make_url(DATABASE_URL).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+    )
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        pool_size=10,
+        max_overflow=20,
+        pool_timeout=30,
+        pool_recycle=1800,
+        echo=False
+    )
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
@@ -1,8 +1,9 @@
 # app/models.py
 import enum
 import uuid
-from sqlalchemy import Column, String, Enum, DateTime,Integer,Index,Text,UniqueConstraint, func
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import BigInteger, Column, Computed, String, Enum, DateTime,Integer,Index,Text,UniqueConstraint, func, text
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR, UUID
+from sqlalchemy.orm import deferred
 from sqlalchemy.ext.declarative import declarative_base
 
 import enum
@@ -24,7 +25,8 @@ class Task(Base):
     __tablename__ = "tasks"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(String(255), nullable=False)
+    # part of the key because tasks is hash-partitioned on user_id
+    user_id = Column(String(255), primary_key=True)
     title = Column(String(255), nullable=False)
     description = Column(String, nullable=True)
     status = Column(
@@ -34,7 +36,50 @@ class Task(Base):
     )
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    # maintained by PostgreSQL; deferred so regular task reads never fetch it
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+            persisted=True
+        )
+    ))
     __table_args__ = (
         Index("idx_tasks_created_at", "created_at"),
-        Index("idx_tasks_status", "status"),
+        Index("idx_tasks_user_id_created_at_id", user_id, created_at.desc(), id.desc()),
+        Index(
+            "idx_tasks_user_pending", user_id, created_at.desc(), id.desc(),
+            postgresql_where=text("status = 'pending'")
+        ),
+        Index(
+            "idx_tasks_user_in_progress", user_id, created_at.desc(), id.desc(),
+            postgresql_where=text("status = 'in_progress'")
+        ),
+        Index("idx_tasks_search_vector", "search_vector", postgresql_using="gin"),
+        Index("uq_tasks_user_id_title", "user_id", "title", unique=True),
     )
+
+
+class TaskCounter(Base):
+    """
+    Per-user, per-status task counts, maintained by statement-level triggers on tasks.
+    """
+    __tablename__ = "task_counters"
+
+    user_id = Column(String(255), primary_key=True)
+    status = Column(String(11), primary_key=True)
+    task_count = Column(BigInteger, nullable=False, server_default="0")
+
+
+class TaskOutbox(Base):
+    """
+    Side effects of task writes, inserted in the same transaction as the write
+    and delivered after commit by bg_tasks.outbox_relay.
+    """
+    __tablename__ = "task_outbox"
+
+    id = Column(BigInteger, primary_key=True)
+    event_type = Column(String(50), nullable=False)
+    payload = Column(JSONB, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,273 @@
+"""
+Online repartitioning of the hash-partitioned tasks table.
+
+A shadow table with the new partition count is built next to tasks and kept
+in sync by a mirror trigger while the existing rows are copied over in small
+batches. The two tables are then swapped in one short locked transaction.
+
+CLI usage:
+    python -m task_app.app.database_setup.repartition_tasks --partitions 16
+    python -m task_app.app.database_setup.repartition_tasks --abort
+"""
+import argparse
+import re
+import time
+from sqlalchemy import text
+from task_app.app.database_setup.database import engine
+
+TABLE = "tasks"
+SHADOW = "tasks_repartition"
+SUFFIX = "_repartition"
+MIRROR = "tasks_repartition_mirror"
+
+
+def partition_count(conn) -> int:
+    return conn.execute(
+        text("SELECT count(*) FROM pg_inherits WHERE inhparent = CAST(:table AS regclass)"),
+        {"table": TABLE}
+    ).scalar()
+
+
+def copy_columns(conn) -> list[str]:
+    """
+    Stored columns of tasks in table order; generated columns are recomputed on insert.
+    """
+    return list(conn.execute(
+        text(
+            "SELECT attname FROM pg_attribute "
+            "WHERE attrelid = CAST(:table AS regclass) AND attnum > 0 "
+            "AND NOT attisdropped AND attgenerated = '' ORDER BY attnum"
+        ),
+        {"table": TABLE}
+    ).scalars())
+
+
+def key_columns(conn) -> list[str]:
+    return list(conn.execute(
+        text(
+            "SELECT a.attname FROM pg_index x "
+            "JOIN pg_attribute a ON a.attrelid = x.indrelid AND a.attnum = ANY(x.indkey) "
+            "WHERE x.indrelid = CAST(:table AS regclass) AND x.indisprimary "
+            "ORDER BY array_position(CAST(x.indkey AS int2[]), a.attnum)"
+        ),
+        {"table": TABLE}
+    ).scalars())
+
+
+def create_shadow(conn, partitions: int):
+    """
+    Create the shadow table with the same columns, defaults, checks, keys and
+    indexes as tasks. Indexes are built while it is empty so the backfill and
+    the swap never wait on an index build.
+    """
+    partition_key = conn.execute(
+        text("SELECT pg_get_partkeydef(CAST(:table AS regclass))"), {"table": TABLE}
+    ).scalar()
+    conn.execute(text(
+        f"CREATE TABLE {SHADOW} (LIKE {TABLE} INCLUDING ALL EXCLUDING INDEXES) PARTITION BY {partition_key}"
+    ))
+    for remainder in range(partitions):
+        conn.execute(text(
+            f"CREATE TABLE {SHADOW}_p{remainder} PARTITION OF {SHADOW} "
+            f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})"
+        ))
+
+    constraints = conn.execute(
+        text(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = CAST(:table AS regclass) AND contype IN ('p', 'u', 'x')"
+        ),
+        {"table": TABLE}
+    ).all()
+    for name, definition in constraints:
+        conn.execute(text(f"ALTER TABLE {SHADOW} ADD CONSTRAINT {name}{SUFFIX} {definition}"))
+
+    indexes = conn.execute(
+        text(
+            "SELECT indexname, indexdef FROM pg_indexes "
+            "WHERE schemaname = current_schema() AND tablename = :table "
+            "AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = CAST(:table AS regclass))"
+        ),
+        {"table": TABLE}
+    ).all()
+    for name, definition in indexes:
+        definition = definition.replace(f"INDEX {name} ON", f"INDEX {name}{SUFFIX} ON", 1)
+        definition = re.sub(rf" ON (ONLY )?(\S+\.)?{TABLE} USING ", f" ON {SHADOW} USING ", definition, count=1)
+        conn.execute(text(definition))
+
+
+def install_mirror(conn, columns: list[str], key: list[str]):
+    """
+    Replay every write on tasks into the shadow table in the same transaction.
+    """
+    column_list = ", ".join(columns)
+    conn.execute(text(
+        f"CREATE OR REPLACE FUNCTION {MIRROR}() RETURNS trigger LANGUAGE plpgsql AS $$\n"
+        "BEGIN\n"
+        "    IF TG_OP IN ('UPDATE', 'DELETE') THEN\n"
+        f"        DELETE FROM {SHADOW} WHERE ({', '.join(key)}) = ({', '.join('OLD.' + c for c in key)});\n"
+        "    END IF;\n"
+        "    IF TG_OP IN ('INSERT', 'UPDATE') THEN\n"
+        f"        INSERT INTO {SHADOW} ({column_list}) VALUES ({', '.join('NEW.' + c for c in columns)});\n"
+        "    END IF;\n"
+        "    RETURN NULL;\n"
+        "END\n"
+        "$$"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER {MIRROR} AFTER INSERT OR UPDATE OR DELETE ON {TABLE} "
+        f"FOR EACH ROW EXECUTE FUNCTION {MIRROR}()"
+    ))
+
+
+def backfill(conn, columns: list[str], key: list[str], batch_size: int, pause: float) -> int:
+    """
+    Copy existing rows in primary key order, one short transaction per batch.
+    FOR SHARE holds off concurrent updates/deletes of the batch until it is
+    copied, and rows the trigger already mirrored are left alone.
+    """
+    column_list = ", ".join(columns)
+    key_list = ", ".join(key)
+    after = f"WHERE ({key_list}) > ({', '.join(':k' + str(i) for i in range(len(key)))}) "
+    copied = 0
+    last = None
+    while True:
+        params = {"limit": batch_size}
+        if last is not None:
+            params.update({f"k{i}": value for i, value in enumerate(last)})
+        with conn.begin():
+            row = conn.execute(
+                text(
+                    f"WITH batch AS ("
+                    f"    SELECT {column_list} FROM {TABLE} {after if last is not None else ''}"
+                    f"    ORDER BY {key_list} LIMIT :limit FOR SHARE"
+                    f"), copied AS ("
+                    f"    INSERT INTO {SHADOW} ({column_list}) SELECT {column_list} FROM batch ON CONFLICT DO NOTHING"
+                    f") "
+                    f"SELECT {key_list}, (SELECT count(*) FROM batch) FROM batch "
+                    f"ORDER BY {', '.join(c + ' DESC' for c in key)} LIMIT 1"
+                ),
+                params
+            ).first()
+        if row is None:
+            return copied
+        last = tuple(row[:-1])
+        copied += row[-1]
+        print(f"copied {copied} rows")
+        if pause:
+            time.sleep(pause)
+
+
+def swap(conn, partitions: int, lock_timeout: str):
+    """
+    Replace tasks with the shadow table. Writes are mirrored synchronously, so
+    the exclusive lock is only held for the catalog changes.
+    """
+    with conn.begin():
+        conn.execute(text(f"SET LOCAL lock_timeout = '{lock_timeout}'"))
+        conn.execute(text(f"LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE"))
+        triggers = list(conn.execute(
+            text(
+                "SELECT pg_get_triggerdef(oid) FROM pg_trigger "
+                "WHERE tgrelid = CAST(:table AS regclass) AND NOT tgisinternal AND tgname <> :mirror"
+            ),
+            {"table": TABLE, "mirror": MIRROR}
+        ).scalars())
+
+        conn.execute(text(f"DROP TABLE {TABLE}"))
+        conn.execute(text(f"DROP FUNCTION {MIRROR}()"))
+        conn.execute(text(f"ALTER TABLE {SHADOW} RENAME TO {TABLE}"))
+        for remainder in range(partitions):
+            conn.execute(text(f"ALTER TABLE {SHADOW}_p{remainder} RENAME TO {TABLE}_p{remainder}"))
+
+        constraints = conn.execute(
+            text("SELECT conname FROM pg_constraint WHERE conrelid = CAST(:table AS regclass) AND conname LIKE :pattern"),
+            {"table": TABLE, "pattern": f"%{SUFFIX}"}
+        ).scalars().all()
+        for name in constraints:
+            conn.execute(text(f"ALTER TABLE {TABLE} RENAME CONSTRAINT {name} TO {name[:-len(SUFFIX)]}"))
+
+        indexes = conn.execute(
+            text(
+                "SELECT i.relname FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid "
+                "WHERE x.indrelid = CAST(:table AS regclass) AND i.relname LIKE :pattern"
+            ),
+            {"table": TABLE, "pattern": f"%{SUFFIX}"}
+        ).scalars().all()
+        for name in indexes:
+            conn.execute(text(f"ALTER INDEX {name} RENAME TO {name[:-len(SUFFIX)]}"))
+
+        partition_indexes = conn.execute(
+            text(
+                "SELECT i.relname FROM pg_inherits h "
+                "JOIN pg_index x ON x.indrelid = h.inhrelid JOIN pg_class i ON i.oid = x.indexrelid "
+                "WHERE h.inhparent = CAST(:table AS regclass) AND i.relname LIKE :pattern"
+            ),
+            {"table": TABLE, "pattern": f"{SHADOW}_p%"}
+        ).scalars().all()
+        for name in partition_indexes:
+            conn.execute(text(f"ALTER INDEX {name} RENAME TO {TABLE}_p{name[len(SHADOW) + 2:]}"))
+
+        for definition in triggers:
+            conn.execute(text(definition))
+
+    conn.execute(text(f"ANALYZE {TABLE}"))
+    conn.commit()
+
+
+def abort(conn):
+    """
+    Remove the trigger, function and shadow table left by an interrupted run.
+    """
+    with conn.begin():
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {MIRROR} ON {TABLE}"))
+        conn.execute(text(f"DROP FUNCTION IF EXISTS {MIRROR}()"))
+        conn.execute(text(f"DROP TABLE IF EXISTS {SHADOW}"))
+
+
+def repartition(partitions: int, batch_size: int = 5000, pause: float = 0, lock_timeout: str = "5s"):
+    with engine.connect() as conn:
+        current = partition_count(conn)
+        conn.commit()
+        if current == partitions:
+            print(f"{TABLE} already has {partitions} partitions")
+            return
+
+        with conn.begin():
+            if conn.execute(text("SELECT to_regclass(:shadow)"), {"shadow": SHADOW}).scalar():
+                raise RuntimeError(f"{SHADOW} already exists; run with --abort to clean up the previous attempt")
+            columns = copy_columns(conn)
+            key = key_columns(conn)
+            create_shadow(conn, partitions)
+            install_mirror(conn, columns, key)
+
+        try:
+            copied = backfill(conn, columns, key, batch_size, pause)
+            swap(conn, partitions, lock_timeout)
+        except BaseException:
+            conn.rollback()
+            abort(conn)
+            raise
+        print(f"repartitioned {TABLE} from {current} to {partitions} partitions ({copied} rows copied)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Change the number of tasks hash partitions without downtime")
+    parser.add_argument("--partitions", type=int, help="new partition count")
+    parser.add_argument("--batch-size", type=int, default=5000, help="rows copied per transaction")
+    parser.add_argument("--pause", type=float, default=0, help="seconds to sleep between batches")
+    parser.add_argument("--lock-timeout", default="5s", help="give up the swap if the table lock is not granted in time")
+    parser.add_argument("--abort", action="store_true", help="drop the leftovers of an interrupted run")
+    args = parser.parse_args(argv)
+
+    if args.abort:
+        with engine.connect() as conn:
+            abort(conn)
+        return
+    if not args.partitions or args.partitions < 1:
+        parser.error("--partitions must be a positive integer")
+    repartition(args.partitions, args.batch_size, args.pause, args.lock_timeout)
+
+
+if __name__ == "__main__":
+    main()
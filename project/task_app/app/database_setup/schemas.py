@@ -1,8 +1,9 @@
-from pydantic import BaseModel, Field, constr
+from pydantic import BaseModel, Field, constr, model_validator
 from typing import Optional
 from uuid import UUID
 from datetime import datetime
 from enum import Enum
+from task_app.app.services_config.config import BULK_MAX_ITEMS
 
 class StatusEnum(str, Enum):
     pending = "pending"
@@ -37,4 +38,81 @@ class PaginatedTasks(BaseModel):
 
     class Config:
         from_attributes = True
-        
\ No newline at end of file
+
+class TaskSearchHit(TaskOut):
+    rank: float
+
+class TaskSearchResults(BaseModel):
+    page_size: int
+    next_cursor: Optional[str] = None
+    items: list[TaskSearchHit]
+
+class TaskStats(BaseModel):
+    total: int
+    by_status: dict[StatusEnum, int]
+
+class CursorPaginatedTasks(BaseModel):
+    page_size: int
+    next_cursor: Optional[str] = None
+    items: list[TaskOut]
+
+    class Config:
+        from_attributes = True
+
+class BulkItemStatus(str, Enum):
+    created = "created"
+    duplicate = "duplicate"
+
+class BulkTaskResult(BaseModel):
+    index: int
+    status: BulkItemStatus
+    task: Optional[TaskOut] = None
+    detail: Optional[str] = None
+
+class BulkTaskCreateResult(BaseModel):
+    created: int
+    duplicates: int
+    results: list[BulkTaskResult]
+
+class TaskSort(str, Enum):
+    newest = "newest"
+    oldest = "oldest"
+
+class TaskFilter(BaseModel):
+    status: Optional[StatusEnum] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+    @model_validator(mode="after")
+    def check_not_empty(self):
+        if self.status is None and self.created_after is None and self.created_before is None:
+            raise ValueError("filter needs at least one of status, created_after, created_before")
+        return self
+
+class BulkTaskSelection(BaseModel):
+    ids: Optional[list[UUID]] = Field(None, min_length=1, max_length=BULK_MAX_ITEMS)
+    filter: Optional[TaskFilter] = None
+
+    @model_validator(mode="after")
+    def check_one_selector(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("provide exactly one of ids or filter")
+        return self
+
+class BulkTaskUpdate(BulkTaskSelection):
+    status: StatusEnum
+
+class BulkTaskChangeResult(BaseModel):
+    count: int
+    ids: list[UUID]
+
+class TaskImportError(BaseModel):
+    line: int
+    detail: str
+
+class TaskImportResult(BaseModel):
+    received: int
+    invalid: int
+    inserted: int
+    duplicates: int
+    errors: list[TaskImportError]
@@ -1,8 +1,25 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from .api_routes import manage_task
+from starlette.concurrency import run_in_threadpool
+from .api_routes import manage_task, manage_task_async, manage_task_bulk
+from .database_setup.database import DB_MODE
 from .promethus import promethus
+from .services_config.redis_config import start_invalidation_listener, RateLimitHeadersMiddleware
+from .services_config.rbac_keycloack import jwks_manager
 
 
-app = FastAPI(title="Task Management System")
-app.include_router(manage_task.router)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_invalidation_listener()
+    await run_in_threadpool(jwks_manager.start)
+    yield
+
+
+app = FastAPI(title="Task Management System", lifespan=lifespan)
+app.add_middleware(RateLimitHeadersMiddleware)
+app.include_router(manage_task_bulk.router)
+if DB_MODE == "async":
+    app.include_router(manage_task_async.router)
+else:
+    app.include_router(manage_task.router)
 app.include_router(promethus.router)
\ No newline at end of file
@@ -1,8 +1,10 @@
 from fastapi import FastAPI, Depends
 from sqlalchemy.orm import Session
-from prometheus_client import Gauge, Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import Gauge, Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
 from starlette.responses import Response
 from task_app.app.database_setup.db_session import get_db
+from task_app.app.services_config.redis_config import local_cache, redis_breaker
 from sqlalchemy import text
 import time
 from fastapi import APIRouter
@@ -10,6 +12,44 @@ DB_UP = Gauge("db_up", "Database connectivity status (1=up, 0=down)")
 DB_QUERY_LATENCY = Histogram("db_query_latency_seconds", "DB query latency in seconds")
 DB_ERRORS_TOTAL = Counter("db_errors_total", "Total number of DB errors")
 
+
+class LocalCacheCollector:
+    """
+    Exposes the in-process cache counters at scrape time.
+    """
+    def collect(self):
+        stats = local_cache.stats()
+        yield CounterMetricFamily("local_cache_hits", "Local cache hits", value=stats["hits"])
+        yield CounterMetricFamily("local_cache_misses", "Local cache misses", value=stats["misses"])
+        yield CounterMetricFamily("local_cache_evictions", "Local cache LRU evictions", value=stats["evictions"])
+        yield GaugeMetricFamily("local_cache_entries", "Entries held in the local cache", value=stats["size"])
+
+
+class RedisBreakerCollector:
+    """
+    Exposes the Redis circuit breaker state and the fallbacks taken while
+    Redis was failing or the circuit was open.
+    """
+    STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+    def collect(self):
+        stats = redis_breaker.stats()
+        yield GaugeMetricFamily(
+            "redis_circuit_state", "Redis circuit breaker state (0=closed, 1=half-open, 2=open)",
+            value=self.STATES[stats["state"]]
+        )
+        yield CounterMetricFamily("redis_circuit_failures", "Failed Redis calls", value=stats["failures"])
+        yield CounterMetricFamily("redis_circuit_rejected", "Redis calls skipped while the circuit was open", value=stats["rejected"])
+        yield CounterMetricFamily("redis_circuit_opened", "Times the Redis circuit opened", value=stats["opened"])
+        fallbacks = CounterMetricFamily("redis_fallbacks", "Requests served without Redis, by operation", labels=["operation"])
+        for operation, count in stats["fallbacks"].items():
+            fallbacks.add_metric([operation], count)
+        yield fallbacks
+
+
+REGISTRY.register(LocalCacheCollector())
+REGISTRY.register(RedisBreakerCollector())
+
 router = APIRouter(tags=["Health"])
 @router.get("/metrics")
 def metrics(db: Session = Depends(get_db)):
@@ -0,0 +1,118 @@
+import threading
+import time
+from collections import Counter
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker shared by the threadpool and event loop.
+    After `failure_threshold` failures in a row calls are rejected without
+    touching the dependency for `reset_timeout` seconds; then a single probe
+    call is let through and its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 10,
+                 exceptions: tuple = (Exception,)):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.exceptions = exceptions
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self.total_failures = 0
+        self.rejected = 0
+        self.opened = 0
+        self.fallbacks = Counter()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.total_failures += 1
+            self._failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.opened += 1
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def release_probe(self):
+        """
+        The call ended without saying anything about the dependency
+        (cancelled, or failed with an error outside `exceptions`): let the
+        next call probe instead of leaving the circuit half-open for good.
+        """
+        with self._lock:
+            self._probing = False
+
+    def record_fallback(self, kind: str):
+        with self._lock:
+            self.fallbacks[kind] += 1
+
+    def call(self, func, *args, **kwargs):
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        try:
+            result = func(*args, **kwargs)
+        except self.exceptions:
+            self.record_failure()
+            raise
+        except BaseException:
+            self.release_probe()
+            raise
+        self.record_success()
+        return result
+
+    async def acall(self, func, *args, **kwargs):
+        """call() for coroutine functions"""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        try:
+            result = await func(*args, **kwargs)
+        except self.exceptions:
+            self.record_failure()
+            raise
+        except BaseException:
+            self.release_probe()
+            raise
+        self.record_success()
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "failures": self.total_failures,
+                "rejected": self.rejected,
+                "opened": self.opened,
+                "fallbacks": dict(self.fallbacks),
+            }
@@ -8,6 +8,12 @@ GRANT_TYPE ="password"
 TOKEN_URL = f"{KEYCLOAK_SERVER_URL}/realms/{KEYCLOAK_REALM}/protocol/openid-connect/token"
 USERNAME = "Test_user"
 PASSWORD = "test_pass"
+# verified JWT claims are cached per worker until exp, capped at TOKEN_CACHE_TTL seconds
+TOKEN_CACHE_MAX_ENTRIES = 10000
+TOKEN_CACHE_TTL = 300
+# signing keys are refreshed in the background; an unknown kid triggers at most one re-fetch per interval
+JWKS_REFRESH_INTERVAL = 300
+JWKS_MIN_REFETCH_INTERVAL = 30
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{KEYCLOAK_SERVER_URL}realms/{KEYCLOAK_REALM}/protocol/openid-connect/token")
 
 MAIL_SUBJECT = "New Task Created | Review and Take Action"
@@ -19,8 +25,78 @@ MAIL_BODY = (
     "Regards,\n"
     "Task Management System"
 )
+BULK_MAIL_BODY = (
+    "Hello,\n\n"
+    "This is to inform you that {count} new tasks have been successfully created in the system.\n"
+    "Kindly review the task details, verify the assigned responsibilities, and proceed with the required actions.\n"
+    "Please ensure timely completion as per the defined priority and deadlines.\n\n"
+    "Regards,\n"
+    "Task Management System"
+)
 TO_ADDRESS = '{reciever_mail}'
 GMAIL_USER = "{sender_mail}"
 GMAIL_APP_PASSWORD = "{smtp_key}"
+# SMTP_HOST/SMTP_PORT/SMTP_USE_SSL can be overridden from the environment, e.g. to point at a local SMTP stand-in
+SMTP_HOST = "smtp.gmail.com"
+SMTP_PORT = 465
+SMTP_USE_SSL = True
+SMTP_TIMEOUT = 10
+# notifications are queued in Redis and sent in batches of up to EMAIL_BATCH_SIZE
+# every EMAIL_BATCH_WINDOW seconds, or as soon as a full batch is waiting
+EMAIL_QUEUE_KEY = "email:pending"
+EMAIL_BATCH_SIZE = 100
+EMAIL_BATCH_WINDOW = 5
+EMAIL_FLUSH_LOCK_TTL = 60
+EMAIL_SEND_RETRIES = 5
+# task_outbox rows drained per relay transaction, and how often (seconds) the relay runs
+OUTBOX_BATCH_SIZE = 500
+OUTBOX_RELAY_INTERVAL = 1
+# task change events are relayed to this Redis Stream, trimmed to roughly TASK_EVENTS_MAXLEN entries
+TASK_EVENTS_STREAM = "tasks:events"
+TASK_EVENTS_MAXLEN = 100000
+# stream consumers: entries per batch, XREADGROUP block in ms, idle ms before another consumer claims an
+# unacknowledged entry, and deliveries before the entry is moved to the group's dead-letter stream
+STREAM_BATCH_SIZE = 100
+STREAM_BLOCK_MS = 5000
+STREAM_CLAIM_IDLE_MS = 60000
+STREAM_MAX_DELIVERIES = 5
 REDIS_URL = "redis://localhost:6379/0"
-DATABASE_URL = "{test_databse_url}"
\ No newline at end of file
+# connections per worker process (each pool), seconds to wait for a free one, socket timeouts in seconds;
+# Redis sits on the request path, so a slow call gives up quickly and the request falls back to the database
+REDIS_MAX_CONNECTIONS = 50
+REDIS_POOL_TIMEOUT = 0.5
+REDIS_SOCKET_TIMEOUT = 0.25
+REDIS_CONNECT_TIMEOUT = 0.25
+REDIS_HEALTH_CHECK_INTERVAL = 30
+# after REDIS_BREAKER_FAILURES consecutive errors Redis is skipped for REDIS_BREAKER_RESET_TIMEOUT seconds
+REDIS_BREAKER_FAILURES = 5
+REDIS_BREAKER_RESET_TIMEOUT = 10
+# task list pages are invalidated by a per-user generation bump, so the TTL only bounds memory
+TASKS_CACHE_TTL = 600
+# per-worker L1 tier in front of Redis, evicted across workers over pub/sub
+LOCAL_CACHE_MAX_ENTRIES = 10000
+LOCAL_CACHE_TTL = 30
+CACHE_INVALIDATION_CHANNEL = "cache:invalidate"
+# single-flight rebuilds: expired copies are kept for CACHE_STALE_TTL seconds,
+# the rebuild lock lives CACHE_REBUILD_LOCK_TTL ms, waiters give up after CACHE_REBUILD_WAIT seconds
+CACHE_STALE_TTL = 30
+CACHE_REBUILD_LOCK_TTL = 5000
+CACHE_REBUILD_WAIT = 2
+# per-user request budget: RATE_LIMIT units per RATE_LIMIT_WINDOW seconds, "sliding_window" or "token_bucket"
+RATE_LIMIT = 100
+RATE_LIMIT_WINDOW = 60
+RATE_LIMIT_MODE = "sliding_window"
+# per-worker budget enforced while Redis is unavailable; lower than RATE_LIMIT since every worker counts separately
+RATE_LIMIT_FALLBACK = 20
+# bulk endpoints: max items per request and rate limit units charged per call
+BULK_MAX_ITEMS = 1000
+BULK_RATE_LIMIT_COST = 10
+# rows fetched per round trip from the server-side cursor behind GET /tasks/export
+EXPORT_BATCH_SIZE = 1000
+# POST /tasks/import: rows per COPY chunk and validation errors echoed back
+IMPORT_CHUNK_ROWS = 5000
+IMPORT_MAX_ERRORS = 100
+DATABASE_URL = "{test_databse_url}"
+
+# "sync" runs TaskAPI on the threadpool with Session, "async" uses AsyncSession and async def routes
+DB_MODE = "sync"
@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+
+
+class LocalCache:
+    """
+    Bounded in-process LRU cache with per-entry TTL.
+    Sits in front of Redis in each worker; thread-safe for the sync threadpool routes.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # every invalidation takes a sequence number; keys remember their last
+        # one so a value read from Redis before it is not cached after it
+        self._seq = 0
+        self._invalidated: OrderedDict = OrderedDict()
+        self._floor = 0
+
+    @property
+    def epoch(self) -> int:
+        """Read before fetching a value from Redis and pass to set() as `since`"""
+        return self._seq
+
+    def get(self, key: str):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value, ttl: float | None = None, since: int | None = None) -> bool:
+        """Store `value`, unless the key was invalidated after epoch `since`"""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._lock:
+            if since is not None and (self._floor > since or self._invalidated.get(key, 0) > since):
+                return False
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return True
+
+    def delete(self, *keys: str):
+        with self._lock:
+            self._seq += 1
+            for key in keys:
+                self._entries.pop(key, None)
+                self._invalidated[key] = self._seq
+                self._invalidated.move_to_end(key)
+            # forgetting a key's invalidation means treating every key as invalidated then
+            while len(self._invalidated) > self.maxsize:
+                self._floor = max(self._floor, self._invalidated.popitem(last=False)[1])
+
+    def delete_matching(self, pattern: str):
+        with self._lock:
+            self._seq += 1
+            self._floor = self._seq
+            for key in [key for key in self._entries if fnmatchcase(key, pattern)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._seq += 1
+            self._floor = self._seq
+            self._invalidated.clear()
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+            }
@@ -0,0 +1,34 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LocalRateLimiter:
+    """
+    Per-worker fixed-window limiter used while Redis is unreachable.
+    Every worker counts on its own, so the limit should be a fraction of
+    the shared Redis budget. At most `maxsize` identities are tracked.
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._windows: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, identity: str, cost: int, limit: int, window: int) -> tuple[bool, int, int]:
+        """Consume `cost` units; returns (allowed, remaining, reset_ms)"""
+        window_ms = window * 1000
+        now = int(time.monotonic() * 1000)
+        current = now // window_ms
+        with self._lock:
+            started, used = self._windows.get(identity, (current, 0))
+            if started != current:
+                used = 0
+            allowed = used + cost <= limit
+            if allowed:
+                used += cost
+            self._windows[identity] = (current, used)
+            self._windows.move_to_end(identity)
+            while len(self._windows) > self.maxsize:
+                self._windows.popitem(last=False)
+        return allowed, max(0, limit - used), window_ms - now % window_ms
@@ -1,13 +1,19 @@
 from functools import lru_cache
 from typing import List, Dict, Any
 
+import hashlib
 import logging
+import threading
+import time
 import requests
 from fastapi import Depends, HTTPException, status
-from jose import jwt, JOSEError
+from fastapi.concurrency import run_in_threadpool
+from jose import jwk, jwt, JOSEError
 from pydantic import BaseModel
 
 from .config import CERTS_URL, KEYCLOAK_CLIENT_ID, oauth2_scheme
+from .config import TOKEN_CACHE_MAX_ENTRIES, TOKEN_CACHE_TTL, JWKS_REFRESH_INTERVAL, JWKS_MIN_REFETCH_INTERVAL
+from .local_cache import LocalCache
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -18,31 +24,96 @@ class AuthenticatedUser(BaseModel):
     roles: List[str]
 
 
+# Verified claims keyed by token digest; entries never outlive the token's exp
+_verified_tokens = LocalCache(maxsize=TOKEN_CACHE_MAX_ENTRIES, ttl=TOKEN_CACHE_TTL)
 
-@lru_cache()
-def load_jwks() -> Dict[str, Any]:
+
+class JWKSManager:
     """
-    Fetch and cache JWKS keys from Keycloak.
-    Cached to avoid repeated network calls.
+    Keeps Keycloak signing keys parsed and indexed by kid.
+    Keys are refreshed in the background and re-fetched (rate-limited) when a
+    token carries an unknown kid; on fetch failures the last good keys stay in use.
     """
-    try:
-        response = requests.get(CERTS_URL, timeout=5)
-        response.raise_for_status()
-        logger.info("JWKS loaded successfully from Keycloak")
-        return response.json()
-    except requests.RequestException as exc:
-        logger.exception("Failed to fetch JWKS from Keycloak")
+
+    def __init__(self, certs_url: str, refresh_interval: float, min_refetch_interval: float, timeout: float = 5):
+        self.certs_url = certs_url
+        self.refresh_interval = refresh_interval
+        self.min_refetch_interval = min_refetch_interval
+        self.timeout = timeout
+        self._keys: Dict[str, Any] = {}
+        self._fetch_lock = threading.Lock()
+        self._last_fetch_attempt = 0.0
+        self._refresher = None
+
+    def refresh(self, if_older_than: float | None = None) -> bool:
+        """Fetch JWKS and swap in the parsed keys; keeps the current keys on failure"""
+        with self._fetch_lock:
+            # another thread may have fetched while we waited for the lock
+            if if_older_than is not None and time.monotonic() - self._last_fetch_attempt < if_older_than:
+                return True
+            self._last_fetch_attempt = time.monotonic()
+            try:
+                response = requests.get(self.certs_url, timeout=self.timeout)
+                response.raise_for_status()
+                keys = {}
+                for key in response.json().get("keys", []):
+                    if key.get("kid") and key.get("use", "sig") == "sig":
+                        keys[key["kid"]] = jwk.construct(key, key.get("alg", "RS256"))
+            except (requests.RequestException, ValueError, JOSEError):
+                logger.exception("Failed to fetch JWKS from Keycloak")
+                return False
+
+            self._keys = keys
+            logger.info("JWKS loaded successfully from Keycloak (%d keys)", len(keys))
+            return True
+
+    def get_key(self, kid: str):
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+
+        # unknown kid: Keycloak may have rotated keys, re-fetch at most once per interval
+        if time.monotonic() - self._last_fetch_attempt >= self.min_refetch_interval:
+            self.refresh(if_older_than=self.min_refetch_interval)
+            key = self._keys.get(kid)
+            if key is not None:
+                return key
+
+        if not self._keys:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service unavailable"
+            )
         raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Authentication service unavailable"
-        ) from exc
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token signature"
+        )
+
+    def _refresh_forever(self):
+        while True:
+            time.sleep(self.refresh_interval)
+            self.refresh()
+
+    def start(self):
+        """Warm the key set and start the background refresher"""
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+        self.refresh()
+        self._refresher = threading.Thread(target=self._refresh_forever, name="jwks-refresher", daemon=True)
+        self._refresher.start()
+
+
+jwks_manager = JWKSManager(
+    CERTS_URL,
+    refresh_interval=JWKS_REFRESH_INTERVAL,
+    min_refetch_interval=JWKS_MIN_REFETCH_INTERVAL
+)
 
 
-def _get_signing_key(token: str) -> Dict[str, Any]:
+def _get_signing_key(token: str):
     """
-    Extract signing key from JWKS using token KID.
+    Resolve the signing key for the token KID.
     """
-    jwks = load_jwks()
     token_header = jwt.get_unverified_header(token)
 
     kid = token_header.get("kid")
@@ -52,21 +123,25 @@ def _get_signing_key(token: str) -> Dict[str, Any]:
             detail="Invalid token header"
         )
 
-    for key in jwks.get("keys", []):
-        if key.get("kid") == kid:
-            return key
+    return jwks_manager.get_key(kid)
+
 
-    raise HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Invalid token signature"
-    )
 
+def _token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
 
 
 def decode_access_token(token: str) -> AuthenticatedUser:
     """
     Decode and validate JWT token and extract user information.
+    Successful verifications are cached until the token expires, so the
+    RS256 check only runs the first time a token is seen.
     """
+    token_digest = _token_digest(token)
+    cached_user = _verified_tokens.get(token_digest)
+    if cached_user is not None:
+        return cached_user
+
     try:
         signing_key = _get_signing_key(token)
 
@@ -92,7 +167,10 @@ def decode_access_token(token: str) -> AuthenticatedUser:
 
         logger.info("Authenticated user: %s", username)
 
-        return AuthenticatedUser(username=username, roles=roles)
+        user = AuthenticatedUser(username=username, roles=roles)
+        if payload.get("exp"):
+            _verified_tokens.set(token_digest, user, ttl=payload["exp"] - time.time())
+        return user
 
     except JOSEError as exc:
         logger.warning("JWT validation failed")
@@ -108,14 +186,22 @@ async def get_authenticated_user(
 ) -> AuthenticatedUser:
     """
     FastAPI dependency to retrieve authenticated user.
+    Cached tokens are answered on the event loop; verification, which may
+    re-fetch the JWKS from Keycloak, runs in the threadpool.
     """
-    return decode_access_token(token)
+    cached_user = _verified_tokens.get(_token_digest(token))
+    if cached_user is not None:
+        return cached_user
+    return await run_in_threadpool(decode_access_token, token)
 
 
+@lru_cache()
 def require_role(*allowed_roles: str):
     """
     Dependency factory for role-based access control.
     Accepts multiple allowed roles. User needs at least one of them.
+    Memoized so every require_role("admin", "user") is the same dependency
+    and FastAPI resolves it once per request.
     """
     def _role_dependency(
         user: AuthenticatedUser = Depends(get_authenticated_user),
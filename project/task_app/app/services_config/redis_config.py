@@ -1,45 +1,729 @@
+import os
 import redis
+import redis.asyncio
+import hashlib
 import json
+import logging
+import math
+import threading
+import time
+import uuid
+from functools import lru_cache
+from typing import NamedTuple
 from task_app.app.services_config.rbac_keycloack import require_role
-from fastapi import HTTPException, status, Depends
+from task_app.app.services_config.local_cache import LocalCache
+from task_app.app.services_config.local_rate_limiter import LocalRateLimiter
+from task_app.app.services_config.circuit_breaker import CircuitBreaker, CircuitOpenError
+from task_app.app.services_config.config import LOCAL_CACHE_MAX_ENTRIES, LOCAL_CACHE_TTL, CACHE_INVALIDATION_CHANNEL
+from task_app.app.services_config.config import CACHE_STALE_TTL, CACHE_REBUILD_LOCK_TTL, CACHE_REBUILD_WAIT
+from task_app.app.services_config.config import RATE_LIMIT, RATE_LIMIT_WINDOW, RATE_LIMIT_MODE, RATE_LIMIT_FALLBACK
+from task_app.app.services_config.config import REDIS_URL, REDIS_MAX_CONNECTIONS, REDIS_POOL_TIMEOUT, REDIS_SOCKET_TIMEOUT
+from task_app.app.services_config.config import REDIS_CONNECT_TIMEOUT, REDIS_HEALTH_CHECK_INTERVAL
+from task_app.app.services_config.config import REDIS_BREAKER_FAILURES, REDIS_BREAKER_RESET_TIMEOUT
+from fastapi import HTTPException, Request, status, Depends
+from starlette.datastructures import MutableHeaders
 
+logger = logging.getLogger(__name__)
 
+
+REDIS_URL = os.getenv("REDIS_URL", REDIS_URL)
+
+
+def _pool_options(decode_responses: bool) -> dict:
+    return {
+        "max_connections": REDIS_MAX_CONNECTIONS,
+        "timeout": REDIS_POOL_TIMEOUT,
+        "socket_timeout": REDIS_SOCKET_TIMEOUT,
+        "socket_connect_timeout": REDIS_CONNECT_TIMEOUT,
+        "health_check_interval": REDIS_HEALTH_CHECK_INTERVAL,
+        "decode_responses": decode_responses,
+    }
+
+
+# blocking pools: under load callers queue for a connection instead of opening unbounded sockets
 redis_client = redis.StrictRedis(
-    host="localhost",
-    port=6379,
-    db=0,
-    decode_responses=True
+    connection_pool=redis.BlockingConnectionPool.from_url(REDIS_URL, **_pool_options(True))
+)
+
+# cached responses are stored as ready-to-send JSON bytes; this client
+# shares the server but skips decoding so hits go out byte for byte
+cache_client = redis.StrictRedis(
+    connection_pool=redis.BlockingConnectionPool.from_url(REDIS_URL, **_pool_options(False))
 )
 
-def get_cache(key: str):
-    """Fetch value from Redis cache"""
-    value = redis_client.get(key)
-    return json.loads(value) if value else None
+# asyncio counterparts used by the DB_MODE=async routes, so Redis calls do not tie up threadpool workers
+async_redis_client = redis.asyncio.Redis(
+    connection_pool=redis.asyncio.BlockingConnectionPool.from_url(REDIS_URL, **_pool_options(True))
+)
+async_cache_client = redis.asyncio.Redis(
+    connection_pool=redis.asyncio.BlockingConnectionPool.from_url(REDIS_URL, **_pool_options(False))
+)
+
+# Request-path Redis calls go through the breaker. Any failure, or an open
+# circuit, makes the caller fall back: cache reads and writes are skipped so
+# the database answers, and rate limiting moves to a per-worker limiter.
+redis_breaker = CircuitBreaker(
+    "redis",
+    failure_threshold=REDIS_BREAKER_FAILURES,
+    reset_timeout=REDIS_BREAKER_RESET_TIMEOUT,
+    exceptions=(redis.RedisError,)
+)
+REDIS_ERRORS = (redis.RedisError, CircuitOpenError)
+_fallback_limiter = LocalRateLimiter()
+
+def _redis_fallback(kind: str, exc: Exception):
+    redis_breaker.record_fallback(kind)
+    if not isinstance(exc, CircuitOpenError):
+        logger.warning("Redis %s failed, falling back: %s", kind, exc)
+
+# L1 tier in front of Redis, only consulted while this worker is subscribed
+# to invalidations so a missed broadcast can never serve stale data.
+local_cache = LocalCache(maxsize=LOCAL_CACHE_MAX_ENTRIES, ttl=LOCAL_CACHE_TTL)
+_invalidations_subscribed = threading.Event()
+_listener_thread = None
+
+def get_cache(key: str) -> bytes | None:
+    """Fetch the serialized body from the local tier, then Redis cache"""
+    use_local = _invalidations_subscribed.is_set()
+    if use_local:
+        value = local_cache.get(key)
+        if value is not None:
+            return value
 
-def set_cache(key: str, value, ttl: int = 60):
-    """Set cache with a TTL (in seconds)"""
-    redis_client.set(key, json.dumps(value), ex=ttl)
+    since = local_cache.epoch
+    try:
+        value = redis_breaker.call(cache_client.get, key)
+    except REDIS_ERRORS as exc:
+        _redis_fallback("cache_read", exc)
+        return None
+    if use_local and value is not None:
+        local_cache.set(key, value, since=since)
+    return value
+
+def set_cache(key: str, value: bytes, ttl: int = 60):
+    """Set a serialized body with a TTL (in seconds); skipped while Redis is unavailable"""
+    since = local_cache.epoch
+    try:
+        redis_breaker.call(cache_client.set, key, value, ex=ttl)
+    except REDIS_ERRORS as exc:
+        _redis_fallback("cache_write", exc)
+        return
+    if _invalidations_subscribed.is_set():
+        local_cache.set(key, value, ttl, since=since)
+
+def _invalidation_message(keys=(), pattern: str | None = None) -> str:
+    return json.dumps({"keys": list(keys), "pattern": pattern})
+
+def publish_invalidation(keys: list[str] = (), pattern: str | None = None, pipe=None):
+    """Evict keys locally and broadcast the eviction to every other worker"""
+    local_cache.delete(*keys)
+    if pattern:
+        local_cache.delete_matching(pattern)
+    (pipe or redis_client).publish(CACHE_INVALIDATION_CHANNEL, _invalidation_message(keys, pattern))
 
 def invalidate_cache(key_pattern: str):
     """Delete keys matching a pattern"""
     for key in redis_client.scan_iter(key_pattern):
         redis_client.delete(key)
+    publish_invalidation(pattern=key_pattern)
+
+
+def _apply_invalidation(message: str):
+    payload = json.loads(message)
+    local_cache.delete(*payload.get("keys", []))
+    if payload.get("pattern"):
+        local_cache.delete_matching(payload["pattern"])
+
+def _listen_for_invalidations():
+    while True:
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+            # anything published while we were not subscribed is lost, start clean
+            local_cache.clear()
+            _invalidations_subscribed.set()
+            # get_message polls within the socket timeout instead of blocking on it
+            while True:
+                message = pubsub.get_message(timeout=1.0)
+                if message is not None:
+                    _apply_invalidation(message["data"])
+        except (redis.RedisError, ValueError):
+            logger.exception("Cache invalidation listener disconnected")
+        finally:
+            _invalidations_subscribed.clear()
+            local_cache.clear()
+            pubsub.close()
+        time.sleep(1)
+
+def start_invalidation_listener():
+    """Subscribe this worker to cache invalidations; enables the local tier"""
+    global _listener_thread
+    if _listener_thread is None or not _listener_thread.is_alive():
+        _listener_thread = threading.Thread(
+            target=_listen_for_invalidations,
+            name="cache-invalidation-listener",
+            daemon=True
+        )
+        _listener_thread.start()
+
+
+# compare-and-delete so a rebuild lock is only released by its owner
+_release_lock = redis_client.register_script("""
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+""")
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+_flights: dict[str, _Flight] = {}
+_flights_lock = threading.Lock()
+
+def _store_rebuilt(key: str, value: bytes, ttl: int):
+    pipe = cache_client.pipeline(transaction=False)
+    pipe.set(key, value, ex=ttl)
+    pipe.set(f"{key}:stale", value, ex=ttl + CACHE_STALE_TTL)
+    since = local_cache.epoch
+    try:
+        redis_breaker.call(pipe.execute)
+    except REDIS_ERRORS as exc:
+        _redis_fallback("cache_write", exc)
+        return
+    if _invalidations_subscribed.is_set():
+        local_cache.set(key, value, ttl, since=since)
+
+def _rebuild(key: str, loader, ttl: int):
+    lock_key = f"{key}:lock"
+    token = uuid.uuid4().hex
+    try:
+        locked = redis_breaker.call(redis_client.set, lock_key, token, nx=True, px=CACHE_REBUILD_LOCK_TTL)
+    except REDIS_ERRORS as exc:
+        # no cross-worker coordination without Redis, go straight to the database
+        _redis_fallback("cache_lock", exc)
+        return loader()
+
+    if locked:
+        try:
+            value = loader()
+            _store_rebuilt(key, value, ttl)
+            return value
+        finally:
+            try:
+                redis_breaker.call(_release_lock, keys=[lock_key], args=[token], client=redis_client)
+            except REDIS_ERRORS as exc:
+                # the lock expires after CACHE_REBUILD_LOCK_TTL anyway
+                _redis_fallback("cache_lock", exc)
+
+    # another worker is rebuilding: serve the expired copy, else wait for it
+    try:
+        stale = redis_breaker.call(cache_client.get, f"{key}:stale")
+    except REDIS_ERRORS as exc:
+        _redis_fallback("cache_read", exc)
+        return loader()
+    if stale:
+        return stale
+
+    deadline = time.monotonic() + CACHE_REBUILD_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        value = get_cache(key)
+        if value is not None:
+            return value
+
+    value = loader()
+    _store_rebuilt(key, value, ttl)
+    return value
+
+def get_or_set_cache(key: str, loader, ttl: int = 60) -> bytes:
+    """
+    Cache-aside read with single-flight rebuilds; loader() returns the serialized body.
+    Concurrent misses in this worker share one loader() call, and across
+    workers a short Redis lock lets a single request hit the database while
+    the others get the stale copy or wait for the fresh one.
+    """
+    value = get_cache(key)
+    if value is not None:
+        return value
+
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+
+    if not leader:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    try:
+        flight.value = _rebuild(key, loader, ttl)
+        return flight.value
+    except Exception as exc:
+        flight.error = exc
+        raise
+    finally:
+        with _flights_lock:
+            _flights.pop(key, None)
+        flight.done.set()
+
+
+def _generation_key(username: str) -> str:
+    return f"user:{username}:tasks:gen"
+
+# users whose generation bump did not reach Redis; replayed before this
+# worker reads a generation again so recovered caches are not served stale
+_pending_bumps: set[str] = set()
+_pending_bumps_lock = threading.Lock()
+
+def _unavailable_generation() -> str:
+    """One-off generation while Redis is down: its keys and ETags never match"""
+    return "x" + uuid.uuid4().hex
+
+def _queue_generation_read(pipe, key: str):
+    pipe.set(key, time.time_ns(), nx=True)
+    pipe.get(key)
+
+def _queue_bump(pipe, username: str):
+    key = _generation_key(username)
+    pipe.set(key, time.time_ns(), nx=True)
+    pipe.incr(key)
+    publish_invalidation([key], pipe=pipe)
+
+def _take_pending_bumps() -> list[str]:
+    with _pending_bumps_lock:
+        usernames = list(_pending_bumps)
+        _pending_bumps.clear()
+    return usernames
+
+def _defer_bumps(usernames):
+    with _pending_bumps_lock:
+        _pending_bumps.update(usernames)
+
+def _flush_pending_bumps():
+    if not _pending_bumps:
+        return
+    usernames = _take_pending_bumps()
+    pipe = redis_client.pipeline(transaction=False)
+    for username in usernames:
+        _queue_bump(pipe, username)
+    try:
+        redis_breaker.call(pipe.execute)
+    except REDIS_ERRORS:
+        _defer_bumps(usernames)
+        raise
+
+def get_tasks_generation(username: str) -> str:
+    """
+    Current generation of a user's task list caches.
+    A missing counter is seeded from the clock so keys written before a
+    Redis flush can never be addressed again.
+    """
+    key = _generation_key(username)
+    use_local = _invalidations_subscribed.is_set()
+    if use_local and not _pending_bumps:
+        generation = local_cache.get(key)
+        if generation is not None:
+            return generation
+
+    pipe = redis_client.pipeline(transaction=False)
+    _queue_generation_read(pipe, key)
+    # a bump whose invalidation lands during the read must not be undone by caching it
+    since = local_cache.epoch
+    try:
+        _flush_pending_bumps()
+        generation = redis_breaker.call(pipe.execute)[-1]
+    except REDIS_ERRORS as exc:
+        _redis_fallback("generation", exc)
+        return _unavailable_generation()
+    if use_local:
+        local_cache.set(key, generation, since=since)
+    return generation
+
+def bump_tasks_generation(username: str):
+    """
+    Invalidate every cached task list page of a user with a single INCR.
+    A bump that cannot reach Redis is retried before the next generation read.
+    """
+    pipe = redis_client.pipeline(transaction=False)
+    _queue_bump(pipe, username)
+    try:
+        redis_breaker.call(pipe.execute)
+    except REDIS_ERRORS as exc:
+        _redis_fallback("generation_bump", exc)
+        _defer_bumps([username])
+
+def tasks_cache_key(username: str, *parts, generation: str | None = None) -> str:
+    """
+    Build a task list cache key scoped to the user's current generation.
+    Pass the generation fetched by the rate limiter to skip the lookup.
+    """
+    if generation is None:
+        generation = get_tasks_generation(username)
+    return ":".join([f"user:{username}:tasks:g{generation}", *map(str, parts)])
+
+def tasks_etag(cache_key: str) -> str:
+    """
+    Strong ETag for a generation-scoped key. Every write bumps the generation,
+    so the tag changes whenever the response can, without reading the tasks.
+    """
+    return '"' + hashlib.sha256(cache_key.encode()).hexdigest()[:32] + '"'
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match may list several tags, weak ones included, or be '*'"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+# Both limiters run as one atomic script call: check, consume and expire in a
+# single round trip, using the Redis clock so workers never disagree on time.
+_sliding_window_script = redis_client.register_script("""
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call("TIME")
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local current = math.floor(now / window)
+local elapsed = now % window
+
+local state = redis.call("HMGET", KEYS[1], "w", "c", "p")
+local w = tonumber(state[1]) or current
+local count = tonumber(state[2]) or 0
+local previous = tonumber(state[3]) or 0
+if w ~= current then
+    if w == current - 1 then previous = count else previous = 0 end
+    count = 0
+end
 
+local used = previous * (window - elapsed) / window + count
+local allowed = 0
+if used + cost <= limit then
+    count = count + cost
+    used = used + cost
+    allowed = 1
+end
 
+redis.call("HSET", KEYS[1], "w", current, "c", count, "p", previous)
+redis.call("PEXPIRE", KEYS[1], window * 2)
+return {allowed, math.max(0, math.floor(limit - used)), window - elapsed}
+""")
 
-RATE_LIMIT = 100
-WINDOW = 60  # seconds
+_token_bucket_script = redis_client.register_script("""
+local capacity = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local rate = capacity / window
+local t = redis.call("TIME")
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
 
-def rate_limiter(user=Depends(require_role("admin", "user"))):
-    key = f"rate_limit:{user.username}"
+local state = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
 
-    current = redis_client.incr(key)
+local allowed = 0
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    wait = math.ceil((cost - tokens) / rate)
+end
 
-    if current == 1:
-        redis_client.expire(key, WINDOW)
+redis.call("HSET", KEYS[1], "tokens", tokens, "ts", now)
+redis.call("PEXPIRE", KEYS[1], window)
+if allowed == 1 then
+    wait = math.ceil((capacity - tokens) / rate)
+end
+return {allowed, math.floor(tokens), wait}
+""")
 
-    if current > RATE_LIMIT:
+_rate_limit_scripts = {
+    "sliding_window": _sliding_window_script,
+    "token_bucket": _token_bucket_script,
+}
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_ms: int
+    generation: str | None = None
+
+    def headers(self) -> dict:
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(math.ceil(self.reset_ms / 1000)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = headers["X-RateLimit-Reset"]
+        return headers
+
+
+def _local_generation(username: str) -> str | None:
+    if _invalidations_subscribed.is_set():
+        return local_cache.get(_generation_key(username))
+    return None
+
+
+def _fallback_rate_limit(identity: str, cost: int, limit: int, window: int) -> RateLimitResult:
+    limit = min(limit, RATE_LIMIT_FALLBACK)
+    allowed, remaining, reset_ms = _fallback_limiter.check(identity, cost, limit, window)
+    return RateLimitResult(allowed, limit, remaining, reset_ms, _unavailable_generation())
+
+
+def _rate_limit_round_trip(identity: str, cost: int, limit: int, window: int, mode: str, generation: str | None) -> list:
+    script = _rate_limit_scripts[mode]
+    for _ in range(2):
+        pipe = redis_client.pipeline(transaction=False)
+        # plain EVALSHA: handing the Script a pipeline adds a SCRIPT EXISTS round trip per execute()
+        pipe.evalsha(script.sha, 1, f"rate_limit:{mode}:{identity}", limit, window * 1000, cost)
+        if generation is None:
+            pipe.get(_generation_key(identity))
+        replies = pipe.execute(raise_on_error=False)
+        if not isinstance(replies[0], redis.exceptions.NoScriptError):
+            break
+        # script cache was flushed (restart, failover): load it once and retry
+        script.sha = redis_client.script_load(script.script)
+    for reply in replies:
+        if isinstance(reply, Exception):
+            raise reply
+    return replies
+
+
+def check_rate_limit(identity: str, cost: int = 1, limit: int = RATE_LIMIT,
+                     window: int = RATE_LIMIT_WINDOW, mode: str = RATE_LIMIT_MODE) -> RateLimitResult:
+    """
+    Consume `cost` units from the identity's budget of `limit` per `window` seconds.
+    The identity's task cache generation is fetched in the same pipeline, so
+    a request pays one Redis round trip for both. While Redis is unavailable
+    the per-worker fallback limiter applies instead.
+    """
+    since = local_cache.epoch
+    try:
+        _flush_pending_bumps()
+        generation = _local_generation(identity)
+        replies = redis_breaker.call(_rate_limit_round_trip, identity, cost, limit, window, mode, generation)
+    except REDIS_ERRORS as exc:
+        _redis_fallback("rate_limit", exc)
+        return _fallback_rate_limit(identity, cost, limit, window)
+
+    allowed, remaining, reset_ms = replies[0]
+    if generation is None:
+        generation = replies[1]
+        if generation is None:
+            generation = get_tasks_generation(identity)
+        elif _invalidations_subscribed.is_set():
+            local_cache.set(_generation_key(identity), generation, since=since)
+    return RateLimitResult(bool(allowed), limit, remaining, reset_ms, generation)
+
+
+def _raise_if_limited(request: Request, result: RateLimitResult) -> RateLimitResult:
+    request.state.rate_limit_headers = result.headers()
+    if not result.allowed:
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail="Rate limit exceeded. Try again later."
+            detail="Rate limit exceeded. Try again later.",
+            headers=result.headers()
         )
+    return result
+
+
+@lru_cache()
+def rate_limit(cost: int = 1):
+    """
+    Dependency factory for per-user rate limiting; `cost` lets expensive
+    routes consume more of the budget. The X-RateLimit-* headers are
+    attached to the response by RateLimitHeadersMiddleware. Resolves to the
+    RateLimitResult, whose generation routes can reuse for cache keys.
+    """
+    def _rate_limit_dependency(request: Request, user=Depends(require_role("admin", "user"))):
+        return _raise_if_limited(request, check_rate_limit(user.username, cost))
+
+    return _rate_limit_dependency
+
+
+rate_limiter = rate_limit()
+
+
+# ---------------- asyncio variants for DB_MODE=async ----------------
+
+_async_rate_limit_scripts = {
+    mode: async_redis_client.register_script(script.script)
+    for mode, script in _rate_limit_scripts.items()
+}
+
+
+async def async_get_cache(key: str) -> bytes | None:
+    use_local = _invalidations_subscribed.is_set()
+    if use_local:
+        value = local_cache.get(key)
+        if value is not None:
+            return value
+
+    since = local_cache.epoch
+    try:
+        value = await redis_breaker.acall(async_cache_client.get, key)
+    except REDIS_ERRORS as exc:
+        _redis_fallback("cache_read", exc)
+        return None
+    if use_local and value is not None:
+        local_cache.set(key, value, since=since)
+    return value
+
+
+async def async_set_cache(key: str, value: bytes, ttl: int = 60):
+    since = local_cache.epoch
+    try:
+        await redis_breaker.acall(async_cache_client.set, key, value, ex=ttl)
+    except REDIS_ERRORS as exc:
+        _redis_fallback("cache_write", exc)
+        return
+    if _invalidations_subscribed.is_set():
+        local_cache.set(key, value, ttl, since=since)
+
+
+async def _async_pipeline(queue) -> list:
+    """Run the commands queued by queue(pipe) in one round trip on the asyncio client"""
+    async with async_redis_client.pipeline(transaction=False) as pipe:
+        queue(pipe)
+        return await pipe.execute()
+
+
+async def _async_flush_pending_bumps():
+    if not _pending_bumps:
+        return
+    usernames = _take_pending_bumps()
+
+    def queue(pipe):
+        for username in usernames:
+            _queue_bump(pipe, username)
+
+    try:
+        await redis_breaker.acall(_async_pipeline, queue)
+    except REDIS_ERRORS:
+        _defer_bumps(usernames)
+        raise
+
+
+async def async_get_tasks_generation(username: str) -> str:
+    generation = None if _pending_bumps else _local_generation(username)
+    if generation is not None:
+        return generation
+
+    key = _generation_key(username)
+    since = local_cache.epoch
+    try:
+        await _async_flush_pending_bumps()
+        generation = (await redis_breaker.acall(_async_pipeline, lambda pipe: _queue_generation_read(pipe, key)))[-1]
+    except REDIS_ERRORS as exc:
+        _redis_fallback("generation", exc)
+        return _unavailable_generation()
+    if _invalidations_subscribed.is_set():
+        local_cache.set(key, generation, since=since)
+    return generation
+
+
+async def async_bump_tasks_generation(username: str):
+    try:
+        await redis_breaker.acall(_async_pipeline, lambda pipe: _queue_bump(pipe, username))
+    except REDIS_ERRORS as exc:
+        _redis_fallback("generation_bump", exc)
+        _defer_bumps([username])
+
+
+async def async_tasks_cache_key(username: str, *parts, generation: str | None = None) -> str:
+    if generation is None:
+        generation = await async_get_tasks_generation(username)
+    return ":".join([f"user:{username}:tasks:g{generation}", *map(str, parts)])
+
+
+async def _async_rate_limit_round_trip(identity: str, cost: int, limit: int, window: int, mode: str,
+                                       generation: str | None) -> list:
+    script = _async_rate_limit_scripts[mode]
+    for _ in range(2):
+        async with async_redis_client.pipeline(transaction=False) as pipe:
+            pipe.evalsha(script.sha, 1, f"rate_limit:{mode}:{identity}", limit, window * 1000, cost)
+            if generation is None:
+                pipe.get(_generation_key(identity))
+            replies = await pipe.execute(raise_on_error=False)
+        if not isinstance(replies[0], redis.exceptions.NoScriptError):
+            break
+        script.sha = await async_redis_client.script_load(script.script)
+    for reply in replies:
+        if isinstance(reply, Exception):
+            raise reply
+    return replies
+
+
+async def async_check_rate_limit(identity: str, cost: int = 1, limit: int = RATE_LIMIT,
+                                 window: int = RATE_LIMIT_WINDOW, mode: str = RATE_LIMIT_MODE) -> RateLimitResult:
+    """Same single round trip and fallback as check_rate_limit, on the asyncio client"""
+    since = local_cache.epoch
+    try:
+        await _async_flush_pending_bumps()
+        generation = _local_generation(identity)
+        replies = await redis_breaker.acall(_async_rate_limit_round_trip, identity, cost, limit, window, mode, generation)
+    except REDIS_ERRORS as exc:
+        _redis_fallback("rate_limit", exc)
+        return _fallback_rate_limit(identity, cost, limit, window)
+
+    allowed, remaining, reset_ms = replies[0]
+    if generation is None:
+        generation = replies[1]
+        if generation is None:
+            generation = await async_get_tasks_generation(identity)
+        elif _invalidations_subscribed.is_set():
+            local_cache.set(_generation_key(identity), generation, since=since)
+    return RateLimitResult(bool(allowed), limit, remaining, reset_ms, generation)
+
+
+@lru_cache()
+def async_rate_limit(cost: int = 1):
+    """rate_limit for async routes; the check runs on the event loop"""
+    async def _rate_limit_dependency(request: Request, user=Depends(require_role("admin", "user"))):
+        return _raise_if_limited(request, await async_check_rate_limit(user.username, cost))
+
+    return _rate_limit_dependency
+
+
+async_rate_limiter = async_rate_limit()
+
+
+class RateLimitHeadersMiddleware:
+    """
+    Copies the X-RateLimit-* headers computed by the rate limit dependency
+    onto every response, including raw Response objects returned by routes.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                rate_limit_headers = scope.get("state", {}).get("rate_limit_headers")
+                if rate_limit_headers:
+                    headers = MutableHeaders(scope=message)
+                    for name, value in rate_limit_headers.items():
+                        if name not in headers:
+                            headers[name] = value
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
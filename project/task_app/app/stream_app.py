@@ -0,0 +1,272 @@
+"""
+Consumer-group framework for the task change stream, the Redis Streams
+counterpart of celery_app.
+
+The outbox relay publishes task.created, task.updated and task.deleted events
+to TASK_EVENTS_STREAM. Every downstream service reads them through its own
+consumer group, so each group sees every event while the consumers inside a
+group share the work. Delivery is at-least-once and a failed batch is
+delivered again, entry by entry once it fails twice, so handlers must be
+idempotent.
+
+    from task_app.app.stream_app import stream
+
+    @stream.consumer("search-indexer")
+    def index_tasks(events: list[StreamEvent]):
+        ...
+
+CLI usage:
+    python -m task_app.app.stream_app run search-indexer --include my_service.consumers
+    python -m task_app.app.stream_app replay search-indexer --from 0
+    python -m task_app.app.stream_app pending search-indexer
+"""
+import argparse
+import importlib
+import json
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Callable, NamedTuple
+import redis
+from task_app.app.services_config.redis_config import REDIS_URL
+from task_app.app.services_config.config import *
+
+logger = logging.getLogger(__name__)
+
+
+class StreamEvent(NamedTuple):
+    id: str
+    type: str
+    outbox_id: int
+    at: str
+    payload: dict
+
+    @classmethod
+    def from_entry(cls, entry_id: str, fields: dict) -> "StreamEvent":
+        return cls(entry_id, fields["type"], int(fields["outbox_id"]), fields["at"], json.loads(fields["payload"]))
+
+
+class ConsumerGroup(NamedTuple):
+    name: str
+    handler: Callable[[list[StreamEvent]], None]
+    batch_size: int
+
+
+class StreamApp:
+    """
+    Publishes outbox rows to a stream and runs registered consumer groups.
+    """
+
+    def __init__(self, stream: str, url: str = REDIS_URL):
+        self.stream = stream
+        self.dead_letter = f"{stream}:dead"
+        # XREADGROUP blocks for STREAM_BLOCK_MS, longer than the request-path socket timeout allows
+        self.client = redis.StrictRedis.from_url(
+            url,
+            decode_responses=True,
+            socket_timeout=STREAM_BLOCK_MS / 1000 + REDIS_SOCKET_TIMEOUT + 1,
+            socket_connect_timeout=REDIS_CONNECT_TIMEOUT
+        )
+        self.groups: dict[str, ConsumerGroup] = {}
+        self._stopping = False
+
+    def consumer(self, group: str, batch_size: int = STREAM_BATCH_SIZE):
+        """Register a handler that receives batches of up to `batch_size` events"""
+        def register(handler):
+            self.groups[group] = ConsumerGroup(group, handler, batch_size)
+            return handler
+        return register
+
+    def publish(self, rows) -> list[str]:
+        """
+        XADD outbox rows (id, event_type, payload, created_at) in one round trip.
+        The stream is trimmed approximately, which keeps XADD O(1).
+        """
+        pipe = self.client.pipeline(transaction=False)
+        for row in rows:
+            pipe.xadd(
+                self.stream,
+                {
+                    "type": row.event_type,
+                    "outbox_id": row.id,
+                    "at": row.created_at.isoformat(),
+                    "payload": json.dumps(row.payload),
+                },
+                maxlen=TASK_EVENTS_MAXLEN,
+                approximate=True
+            )
+        return pipe.execute()
+
+    def ensure_group(self, group: str, start_id: str = "$"):
+        """Create the group (and the stream) unless it exists; new groups start at `start_id`"""
+        try:
+            self.client.xgroup_create(self.stream, group, id=start_id, mkstream=True)
+        except redis.ResponseError as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+
+    def replay(self, group: str, from_id: str = "0"):
+        """
+        Rewind the group so every entry after `from_id` still in the stream is
+        delivered again. Entries that are already pending stay pending.
+        """
+        self.ensure_group(group, from_id)
+        self.client.xgroup_setid(self.stream, group, from_id)
+
+    def pending(self, group: str) -> dict:
+        return self.client.xpending(self.stream, group)
+
+    def _read(self, spec: ConsumerGroup, consumer: str, start_id: str, block: int | None) -> list:
+        response = self.client.xreadgroup(
+            spec.name, consumer, {self.stream: start_id}, count=spec.batch_size, block=block
+        )
+        return response[0][1] if response else []
+
+    def _live(self, spec: ConsumerGroup, entries: list) -> list:
+        """
+        Pending entries already trimmed from the stream come back without
+        fields; XACK them so they leave the pending list and return the rest.
+        """
+        trimmed = [entry_id for entry_id, fields in entries if not fields]
+        if trimmed:
+            self.client.xack(self.stream, spec.name, *trimmed)
+        return [(entry_id, fields) for entry_id, fields in entries if fields]
+
+    def _events(self, spec: ConsumerGroup, entries: list) -> list[StreamEvent]:
+        return [StreamEvent.from_entry(entry_id, fields) for entry_id, fields in self._live(spec, entries)]
+
+    def _process(self, spec: ConsumerGroup, events: list[StreamEvent]) -> bool:
+        """Run the handler on one batch and XACK it in a single call when it succeeds"""
+        if not events:
+            return True
+        try:
+            spec.handler(events)
+        except Exception:
+            logger.exception("%s failed on %s events, leaving them pending", spec.name, len(events))
+            return False
+        self.client.xack(self.stream, spec.name, *[event.id for event in events])
+        return True
+
+    def _dead_letter(self, spec: ConsumerGroup, entry_id: str, fields: dict, times_delivered: int):
+        logger.error("%s gave up on %s after %s deliveries", spec.name, entry_id, times_delivered)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.xadd(self.dead_letter, {**fields, "group": spec.name, "entry_id": entry_id}, maxlen=TASK_EVENTS_MAXLEN, approximate=True)
+        pipe.xack(self.stream, spec.name, entry_id)
+        pipe.execute()
+
+    def _process_claimed(self, spec: ConsumerGroup, consumer: str, entries: list):
+        """
+        Claimed entries have failed at least once already. When their batch
+        fails again, run them one at a time so healthy neighbours are acked,
+        and move an entry that still fails on its own after
+        STREAM_MAX_DELIVERIES deliveries to the dead-letter stream so one bad
+        event cannot stall the group.
+        """
+        events = [StreamEvent.from_entry(entry_id, fields) for entry_id, fields in entries]
+        if self._process(spec, events):
+            return
+        ids = [entry_id for entry_id, _ in entries]
+        deliveries = {
+            pending["message_id"]: pending["times_delivered"]
+            for pending in self.client.xpending_range(
+                self.stream, spec.name, min=ids[0], max=ids[-1], count=len(ids), consumername=consumer
+            )
+        }
+        for event, (entry_id, fields) in zip(events, entries):
+            if len(events) > 1 and self._process(spec, [event]):
+                continue
+            if deliveries.get(entry_id, 0) > STREAM_MAX_DELIVERIES:
+                self._dead_letter(spec, entry_id, fields, deliveries[entry_id])
+
+    def _claim_stale(self, spec: ConsumerGroup, consumer: str):
+        """
+        Take over entries left unacknowledged for STREAM_CLAIM_IDLE_MS, whether
+        their consumer crashed or their batch failed.
+        """
+        start_id = "0-0"
+        while True:
+            claimed = self.client.xautoclaim(
+                self.stream, spec.name, consumer, STREAM_CLAIM_IDLE_MS, start_id=start_id, count=spec.batch_size
+            )
+            start_id, entries = claimed[0], self._live(spec, claimed[1])
+            # Redis 7 also reports pending entries already trimmed from the stream
+            deleted = claimed[2] if len(claimed) > 2 else []
+            if deleted:
+                self.client.xack(self.stream, spec.name, *deleted)
+            if entries:
+                self._process_claimed(spec, consumer, entries)
+            if start_id == "0-0":
+                return
+
+    def stop(self, *_):
+        self._stopping = True
+
+    def run(self, group: str, consumer: str, start_id: str = "$"):
+        """
+        Consume `group` until stop(): first this consumer's own
+        unacknowledged entries from a previous run, then new entries, with a
+        sweep for stale entries every STREAM_CLAIM_IDLE_MS.
+        """
+        spec = self.groups[group]
+        self.ensure_group(group, start_id)
+
+        last_id = "0"
+        while not self._stopping:
+            entries = self._read(spec, consumer, last_id, None)
+            if not entries:
+                break
+            self._process(spec, self._events(spec, entries))
+            last_id = entries[-1][0]
+
+        next_claim = 0.0
+        while not self._stopping:
+            if time.monotonic() >= next_claim:
+                self._claim_stale(spec, consumer)
+                next_claim = time.monotonic() + STREAM_CLAIM_IDLE_MS / 1000
+            self._process(spec, self._events(spec, self._read(spec, consumer, ">", STREAM_BLOCK_MS)))
+
+
+stream = StreamApp(TASK_EVENTS_STREAM)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Consume the task change event stream")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="consume events as part of a consumer group")
+    run.add_argument("group")
+    run.add_argument("--consumer", default=f"{socket.gethostname()}-{os.getpid()}", help="unique name within the group")
+    run.add_argument("--include", action="append", default=[], help="module that registers the group's handler")
+    run.add_argument("--from", dest="start_id", default="$", help="where a new group starts: '$' (new events) or '0'")
+
+    replay = commands.add_parser("replay", help="deliver entries after an ID to the group again")
+    replay.add_argument("group")
+    replay.add_argument("--from", dest="start_id", default="0", help="stream entry ID to replay after")
+
+    pending = commands.add_parser("pending", help="summarise the group's unacknowledged entries")
+    pending.add_argument("group")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == "replay":
+        stream.replay(args.group, args.start_id)
+        return
+    if args.command == "pending":
+        print(json.dumps(stream.pending(args.group), indent=2, default=str))
+        return
+
+    for module in args.include:
+        importlib.import_module(module)
+    if args.group not in stream.groups:
+        parser.error(f"no handler registered for group '{args.group}'; pass the module with --include")
+    # finish the batch in hand, then exit within STREAM_BLOCK_MS
+    signal.signal(signal.SIGTERM, stream.stop)
+    signal.signal(signal.SIGINT, stream.stop)
+    stream.run(args.group, args.consumer, args.start_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+
+from sqlalchemy import select, func, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from task_app.app.database_setup import schemas
+from task_app.app.database_setup import models
+from task_app.app.services_config.redis_config import async_bump_tasks_generation
+from task_app.app.task_operations.task_service import TASK_CREATED, TASK_UPDATED, TASK_DELETED, email_outbox, task_event, encode_cursor, decode_cursor, task_filter_criteria, task_list_order, total_from_counts
+from uuid import UUID
+from task_app.app.services_config.config import *
+
+async def create_task(db: AsyncSession, task_in: schemas.TaskCreate, user_id: str) -> models.Task:
+    try:
+        async with db.begin():
+            task = (
+                await db.scalars(
+                    pg_insert(models.Task)
+                    .values(
+                        title=task_in.title,
+                        description=task_in.description,
+                        status=task_in.status.value if hasattr(task_in.status, "value") else task_in.status,
+                        user_id=user_id
+                    )
+                    .on_conflict_do_nothing(index_elements=["user_id", "title"])
+                    .returning(models.Task)
+                )
+            ).first()
+            if task is None:
+                raise ValueError(f"Task with title '{task_in.title}' already exists for this user.")
+            db.add_all([task_event(TASK_CREATED, task), email_outbox(MAIL_SUBJECT, MAIL_BODY)])
+        await async_bump_tasks_generation(user_id)
+        return task
+
+    except ValueError:
+        raise
+    except Exception as e:
+        print("ERROR in create_task:", e)
+        raise
+
+
+async def get_task(db: AsyncSession, task_id: UUID, user_id: str) -> models.Task | None:
+    return await db.scalar(
+        select(models.Task).where(
+            models.Task.id == task_id,
+            models.Task.user_id == user_id.username
+        )
+    )
+
+
+async def get_task_counts(db: AsyncSession, user: str) -> dict[str, int]:
+    return {
+        status: count
+        for status, count in await db.execute(
+            select(models.TaskCounter.status, models.TaskCounter.task_count)
+            .where(models.TaskCounter.user_id == user)
+        )
+    }
+
+
+async def get_tasks(
+    db: AsyncSession,
+    page: int = 1,
+    page_size: int = 10,
+    user: str = None,
+    task_filter: schemas.TaskFilter | None = None,
+    sort: schemas.TaskSort = schemas.TaskSort.newest
+):
+    q = select(models.Task).where(*task_filter_criteria(task_filter))
+    if user:
+        q = q.where(models.Task.user_id == user)
+
+    if user and (task_filter is None or (task_filter.created_after is None and task_filter.created_before is None)):
+        total = total_from_counts(await get_task_counts(db, user), task_filter)
+    else:
+        total = await db.scalar(select(func.count()).select_from(q.subquery()))
+    items = (
+        await db.scalars(
+            q.order_by(*task_list_order(sort))
+            .offset((page - 1) * page_size)
+            .limit(page_size)
+        )
+    ).all()
+    return total, items
+
+
+async def get_tasks_by_cursor(
+    db: AsyncSession,
+    page_size: int = 10,
+    cursor: str | None = None,
+    user: str = None,
+    task_filter: schemas.TaskFilter | None = None,
+    sort: schemas.TaskSort = schemas.TaskSort.newest
+):
+    q = select(models.Task).where(*task_filter_criteria(task_filter))
+    if user:
+        q = q.where(models.Task.user_id == user)
+
+    if cursor:
+        created_at, task_id = decode_cursor(cursor)
+        seek_key = tuple_(models.Task.created_at, models.Task.id)
+        q = q.where(seek_key > (created_at, task_id) if sort == schemas.TaskSort.oldest else seek_key < (created_at, task_id))
+
+    rows = (
+        await db.scalars(
+            q.order_by(*task_list_order(sort))
+            .limit(page_size + 1)
+        )
+    ).all()
+    items = rows[:page_size]
+    next_cursor = encode_cursor(items[-1]) if len(rows) > page_size else None
+    return items, next_cursor
+
+
+async def update_task(db: AsyncSession, task_id: UUID, updates: schemas.TaskUpdate, user_id: str):
+    task = await get_task(db, task_id, user_id)
+    if not task:
+        return None
+
+    if updates.title is not None:
+        task.title = updates.title
+    if updates.status is not None:
+        task.status = updates.status.value if hasattr(updates.status, "value") else updates.status
+
+    db.add_all([task, task_event(TASK_UPDATED, task)])
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise ValueError(f"Task with title '{updates.title}' already exists for this user.")
+    await db.refresh(task)
+    await async_bump_tasks_generation(user_id.username)
+    return task
+
+
+async def delete_task(db: AsyncSession, task: models.Task):
+    await db.delete(task)
+    db.add(task_event(TASK_DELETED, task))
+    await db.commit()
+    await async_bump_tasks_generation(task.user_id)
@@ -0,0 +1,161 @@
+"""
+Streaming task import: rows are validated one at a time against
+schemas.TaskCreate, COPY'd into a temporary staging table in fixed-size
+chunks and merged into tasks with INSERT ... ON CONFLICT DO NOTHING.
+
+CLI usage:
+    python -m task_app.app.task_operations.task_import --user <username> tasks.csv
+    cat tasks.ndjson | python -m task_app.app.task_operations.task_import --user <username> --format ndjson -
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+import uuid
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from task_app.app.database_setup import schemas
+from task_app.app.services_config.redis_config import bump_tasks_generation
+from task_app.app.task_operations.task_service import TASK_CREATED, email_outbox
+from task_app.app.services_config.config import *
+
+STAGING_COLUMNS = ("id", "line_no", "title", "description", "status")
+
+
+def iter_rows(stream, format: str):
+    """
+    Yield (line_no, raw_row) pairs from a text stream without reading it whole.
+    """
+    if format == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, {key: value for key, value in row.items() if value not in (None, "")}
+        return
+
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError:
+            yield line_no, None
+
+
+def _copy_chunk(cursor, buffer: io.StringIO):
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY tasks_import_staging ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+        buffer
+    )
+    buffer.seek(0)
+    buffer.truncate()
+
+
+def import_tasks(db: Session, stream, format: str, user_id: str) -> dict:
+    """
+    Load a CSV/NDJSON stream of tasks for one user.
+    Memory is bounded by IMPORT_CHUNK_ROWS rows plus the first
+    IMPORT_MAX_ERRORS validation errors.
+    """
+    received = 0
+    invalid = 0
+    errors = []
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffered = 0
+
+    try:
+        db.execute(text(
+            "CREATE TEMP TABLE tasks_import_staging ("
+            "id uuid NOT NULL, line_no integer NOT NULL, title varchar(255) NOT NULL, "
+            "description varchar, status varchar(11) NOT NULL"
+            ") ON COMMIT DROP"
+        ))
+        cursor = db.connection().connection.cursor()
+
+        for line_no, raw in iter_rows(stream, format):
+            received += 1
+            try:
+                if not isinstance(raw, dict):
+                    raise ValueError("row is not a JSON object")
+                task_in = schemas.TaskCreate.model_validate(raw)
+            except (ValidationError, ValueError) as exc:
+                invalid += 1
+                if len(errors) < IMPORT_MAX_ERRORS:
+                    errors.append({"line": line_no, "detail": str(exc)})
+                continue
+
+            writer.writerow((uuid.uuid4(), line_no, task_in.title, task_in.description, task_in.status.value))
+            buffered += 1
+            if buffered >= IMPORT_CHUNK_ROWS:
+                _copy_chunk(cursor, buffer)
+                buffered = 0
+
+        if buffered:
+            _copy_chunk(cursor, buffer)
+
+        # first occurrence of a title wins, titles the user already has are skipped;
+        # the task.created events are written by the same statement
+        inserted = db.execute(
+            text(
+                "WITH inserted AS ("
+                "    INSERT INTO tasks (id, user_id, title, description, status) "
+                "    SELECT s.id, :user_id, s.title, s.description, s.status "
+                "    FROM tasks_import_staging s "
+                "    ORDER BY s.line_no "
+                "    ON CONFLICT (user_id, title) DO NOTHING "
+                "    RETURNING id, user_id, title, description, status"
+                ") "
+                "INSERT INTO task_outbox (event_type, payload) "
+                "SELECT :event_type, jsonb_build_object("
+                "    'task_id', id, 'user_id', user_id, 'title', title, 'description', description, 'status', status"
+                ") FROM inserted"
+            ),
+            {"user_id": user_id, "event_type": TASK_CREATED}
+        ).rowcount
+        if inserted:
+            db.add(email_outbox(MAIL_SUBJECT, BULK_MAIL_BODY.format(count=inserted)))
+        db.commit()
+
+    except Exception as e:
+        db.rollback()
+        print("ERROR in import_tasks:", e)
+        raise
+
+    if inserted:
+        bump_tasks_generation(user_id)
+
+    return {
+        "received": received,
+        "invalid": invalid,
+        "inserted": inserted,
+        "duplicates": received - invalid - inserted,
+        "errors": errors,
+    }
+
+
+def main(argv=None):
+    from task_app.app.database_setup.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Bulk import tasks for a user via PostgreSQL COPY")
+    parser.add_argument("path", help="CSV or NDJSON file, '-' for stdin")
+    parser.add_argument("--user", required=True, help="username that will own the tasks")
+    parser.add_argument("--format", choices=("csv", "ndjson"), help="defaults to the file extension")
+    args = parser.parse_args(argv)
+
+    format = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+    stream = sys.stdin if args.path == "-" else open(args.path, newline="", encoding="utf-8")
+    db = SessionLocal()
+    try:
+        result = import_tasks(db, stream, format, args.user)
+    finally:
+        db.close()
+        if stream is not sys.stdin:
+            stream.close()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,68 @@
 
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import cast, delete, func, literal, select, tuple_, update
+from sqlalchemy.dialects.postgresql import REAL, REGCONFIG, insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from ..bg_tasks.email_tasks import send_email_notification
 from task_app.app.database_setup import schemas
 from task_app.app.database_setup import models
+from task_app.app.database_setup.database import engine
+from task_app.app.services_config.redis_config import bump_tasks_generation
 from uuid import UUID
 from task_app.app.services_config.config import *
 
+OUTBOX_EMAIL = "email_notification"
+
+TASK_CREATED = "task.created"
+TASK_UPDATED = "task.updated"
+TASK_DELETED = "task.deleted"
+TASK_EVENT_TYPES = (TASK_CREATED, TASK_UPDATED, TASK_DELETED)
+
+def email_outbox(subject: str, body: str) -> models.TaskOutbox:
+    """Notification email queued in the caller's transaction; sent once it commits"""
+    return models.TaskOutbox(
+        event_type=OUTBOX_EMAIL,
+        payload={"subject": subject, "body": body, "to_email": TO_ADDRESS}
+    )
+
+def task_event(event_type: str, task) -> models.TaskOutbox:
+    """
+    Change event for the task's state as written by the caller's transaction,
+    published to TASK_EVENTS_STREAM once it commits. `task` may be a Task or a
+    RETURNING row with the same columns.
+    """
+    return models.TaskOutbox(
+        event_type=event_type,
+        payload={
+            "task_id": str(task.id),
+            "user_id": task.user_id,
+            "title": task.title,
+            "description": task.description,
+            "status": task.status.value if hasattr(task.status, "value") else task.status,
+        }
+    )
+
 def create_task(db: Session, task_in: schemas.TaskCreate, user_id: str) -> models.Task:
     try:
         with db.begin(): 
-            existing_task = db.query(models.Task).filter(
-                models.Task.title == task_in.title,
-                models.Task.user_id == user_id
+            # uq_tasks_user_id_title decides duplicates in the same round trip as the insert
+            task = db.scalars(
+                pg_insert(models.Task)
+                .values(
+                    title=task_in.title,
+                    description=task_in.description,
+                    status=task_in.status.value if hasattr(task_in.status, "value") else task_in.status,
+                    user_id=user_id
+                )
+                .on_conflict_do_nothing(index_elements=["user_id", "title"])
+                .returning(models.Task)
             ).first()
-            if existing_task:
+            if task is None:
                 raise ValueError(f"Task with title '{task_in.title}' already exists for this user.")
-
-            task = models.Task(
-                title=task_in.title,
-                description=task_in.description,
-                status=task_in.status.value if hasattr(task_in.status, "value") else task_in.status,
-                user_id=user_id
-            )
-            db.add(task)
-
-            db.flush()
-            db.refresh(task)  
-        send_email_notification.delay(MAIL_SUBJECT, MAIL_BODY, TO_ADDRESS)
+            db.add_all([task_event(TASK_CREATED, task), email_outbox(MAIL_SUBJECT, MAIL_BODY)])
+        bump_tasks_generation(user_id)
         return task
 
     except ValueError:
@@ -36,6 +72,83 @@ def create_task(db: Session, task_in: schemas.TaskCreate, user_id: str) -> model
         raise
 
 
+def create_tasks_bulk(db: Session, tasks_in: list[schemas.TaskCreate], user_id: str) -> list[dict]:
+    """
+    Create many tasks with one duplicate-check query and one multi-row INSERT.
+    Returns a per-item result in request order; titles that already exist for
+    the user (or repeat within the payload) are reported as duplicates.
+    """
+    results = [None] * len(tasks_in)
+    to_insert = []
+    seen_titles = set()
+    try:
+        with db.begin():
+            existing_titles = set(
+                db.scalars(
+                    select(models.Task.title).where(
+                        models.Task.user_id == user_id,
+                        models.Task.title.in_([task_in.title for task_in in tasks_in])
+                    )
+                )
+            )
+
+            for index, task_in in enumerate(tasks_in):
+                if task_in.title in existing_titles:
+                    results[index] = {
+                        "index": index,
+                        "status": "duplicate",
+                        "detail": f"Task with title '{task_in.title}' already exists for this user."
+                    }
+                    continue
+                if task_in.title in seen_titles:
+                    results[index] = {
+                        "index": index,
+                        "status": "duplicate",
+                        "detail": f"Task with title '{task_in.title}' appears more than once in the request."
+                    }
+                    continue
+                seen_titles.add(task_in.title)
+                to_insert.append((index, {
+                    "title": task_in.title,
+                    "description": task_in.description,
+                    "status": task_in.status.value if hasattr(task_in.status, "value") else task_in.status,
+                    "user_id": user_id
+                }))
+
+            created = {}
+            if to_insert:
+                # a concurrent create can still win a title between the check and the insert
+                created = {
+                    task.title: task
+                    for task in db.scalars(
+                        pg_insert(models.Task)
+                        .on_conflict_do_nothing(index_elements=["user_id", "title"])
+                        .returning(models.Task),
+                        [row for _, row in to_insert]
+                    )
+                }
+                for index, row in to_insert:
+                    if row["title"] in created:
+                        results[index] = {"index": index, "status": "created", "task": created[row["title"]]}
+                    else:
+                        results[index] = {
+                            "index": index,
+                            "status": "duplicate",
+                            "detail": f"Task with title '{row['title']}' already exists for this user."
+                        }
+                if created:
+                    db.add_all([task_event(TASK_CREATED, task) for task in created.values()])
+                    db.add(email_outbox(MAIL_SUBJECT, BULK_MAIL_BODY.format(count=len(created))))
+
+        if created:
+            bump_tasks_generation(user_id)
+        return results
+
+    except Exception as e:
+        print("ERROR in create_tasks_bulk:", e)
+        raise
+
+
 
 def get_task(db: Session, task_id: UUID, user_id: str) -> models.Task | None:
     return (
@@ -48,14 +161,67 @@ def get_task(db: Session, task_id: UUID, user_id: str) -> models.Task | None:
     )
 
 
-def get_tasks(db: Session, page: int = 1, page_size: int = 10, user: str = None):
-    q = db.query(models.Task)
+def get_task_counts(db: Session, user: str) -> dict[str, int]:
+    """
+    Task counts per status for one user, read from the trigger-maintained
+    task_counters table instead of counting the user's rows.
+    """
+    return {
+        status: count
+        for status, count in db.execute(
+            select(models.TaskCounter.status, models.TaskCounter.task_count)
+            .where(models.TaskCounter.user_id == user)
+        )
+    }
+
+
+def task_filter_criteria(task_filter: schemas.TaskFilter | None) -> list:
+    if task_filter is None:
+        return []
+    criteria = []
+    if task_filter.status is not None:
+        criteria.append(models.Task.status == task_filter.status.value)
+    if task_filter.created_after is not None:
+        criteria.append(models.Task.created_at >= task_filter.created_after)
+    if task_filter.created_before is not None:
+        criteria.append(models.Task.created_at < task_filter.created_before)
+    return criteria
+
+
+def task_list_order(sort: schemas.TaskSort) -> tuple:
+    """
+    Both directions walk the (user_id, created_at DESC, id DESC) indexes, oldest first backwards.
+    """
+    if sort == schemas.TaskSort.oldest:
+        return models.Task.created_at.asc(), models.Task.id.asc()
+    return models.Task.created_at.desc(), models.Task.id.desc()
+
+
+def total_from_counts(counts: dict[str, int], task_filter: schemas.TaskFilter | None) -> int:
+    if task_filter is not None and task_filter.status is not None:
+        return counts.get(task_filter.status.value, 0)
+    return sum(counts.values())
+
+
+def get_tasks(
+    db: Session,
+    page: int = 1,
+    page_size: int = 10,
+    user: str = None,
+    task_filter: schemas.TaskFilter | None = None,
+    sort: schemas.TaskSort = schemas.TaskSort.newest
+):
+    q = db.query(models.Task).filter(*task_filter_criteria(task_filter))
     if user:
         q = q.filter(models.Task.user_id == user)
 
-    total = q.count()
+    # the counters cover user and status; a date range still has to be counted
+    if user and (task_filter is None or (task_filter.created_after is None and task_filter.created_before is None)):
+        total = total_from_counts(get_task_counts(db, user), task_filter)
+    else:
+        total = q.count()
     items = (
-        q.order_by(models.Task.created_at.desc())
+        q.order_by(*task_list_order(sort))
         .offset((page - 1) * page_size)
         .limit(page_size)
         .all()
@@ -63,6 +229,65 @@ def get_tasks(db: Session, page: int = 1, page_size: int = 10, user: str = None)
     return total, items
 
 
+def _pack_cursor(fields: dict) -> str:
+    raw = json.dumps(fields)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _unpack_cursor(cursor: str) -> dict:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode()))
+
+
+def encode_cursor(task: models.Task) -> str:
+    """
+    Build an opaque cursor pointing just after the given task.
+    """
+    return _pack_cursor({"c": task.created_at.isoformat(), "i": str(task.id)})
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """
+    Decode a cursor produced by encode_cursor into its (created_at, id) seek key.
+    """
+    try:
+        raw = _unpack_cursor(cursor)
+        return datetime.fromisoformat(raw["c"]), UUID(raw["i"])
+    except (ValueError, KeyError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def get_tasks_by_cursor(
+    db: Session,
+    page_size: int = 10,
+    cursor: str | None = None,
+    user: str = None,
+    task_filter: schemas.TaskFilter | None = None,
+    sort: schemas.TaskSort = schemas.TaskSort.newest
+):
+    """
+    Keyset pagination on (created_at, id): seeks past the cursor instead of
+    scanning OFFSET rows, and skips the total count.
+    """
+    q = db.query(models.Task).filter(*task_filter_criteria(task_filter))
+    if user:
+        q = q.filter(models.Task.user_id == user)
+
+    if cursor:
+        created_at, task_id = decode_cursor(cursor)
+        seek_key = tuple_(models.Task.created_at, models.Task.id)
+        q = q.filter(seek_key > (created_at, task_id) if sort == schemas.TaskSort.oldest else seek_key < (created_at, task_id))
+
+    rows = (
+        q.order_by(*task_list_order(sort))
+        .limit(page_size + 1)
+        .all()
+    )
+    items = rows[:page_size]
+    next_cursor = encode_cursor(items[-1]) if len(rows) > page_size else None
+    return items, next_cursor
+
+
 def update_task(db: Session, task_id: UUID, updates: schemas.TaskUpdate, user_id: str):
     task = (
         db.query(models.Task)
@@ -81,12 +306,131 @@ def update_task(db: Session, task_id: UUID, updates: schemas.TaskUpdate, user_id
     if updates.status is not None:
         task.status = updates.status.value if hasattr(updates.status, "value") else updates.status
 
-    db.add(task)
-    db.commit()
+    db.add_all([task, task_event(TASK_UPDATED, task)])
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise ValueError(f"Task with title '{updates.title}' already exists for this user.")
     db.refresh(task)
+    bump_tasks_generation(user_id.username)
     return task
 
 
 def delete_task(db: Session, task: models.Task):
     db.delete(task)
+    db.add(task_event(TASK_DELETED, task))
+    db.commit()
+    bump_tasks_generation(task.user_id)
+
+
+def _selection_criteria(selection: schemas.BulkTaskSelection, user_id: str) -> list:
+    criteria = [models.Task.user_id == user_id]
+    if selection.ids is not None:
+        criteria.append(models.Task.id.in_(selection.ids))
+        return criteria
+    return criteria + task_filter_criteria(selection.filter)
+
+
+# the columns task_event() reads, for UPDATE/DELETE ... RETURNING
+EVENT_COLUMNS = (
+    models.Task.id, models.Task.user_id, models.Task.title, models.Task.description, models.Task.status
+)
+
+
+def update_tasks_bulk(db: Session, updates: schemas.BulkTaskUpdate, user_id: str) -> list[UUID]:
+    """
+    Set the status of every selected task in one UPDATE ... RETURNING,
+    scoped to the caller's tasks.
+    """
+    changed = db.execute(
+        update(models.Task)
+        .where(*_selection_criteria(updates, user_id))
+        .values(status=updates.status.value)
+        .returning(*EVENT_COLUMNS),
+        execution_options={"synchronize_session": False}
+    ).all()
+    db.add_all([task_event(TASK_UPDATED, task) for task in changed])
     db.commit()
+    if changed:
+        bump_tasks_generation(user_id)
+    return [task.id for task in changed]
+
+
+def delete_tasks_bulk(db: Session, selection: schemas.BulkTaskSelection, user_id: str) -> list[UUID]:
+    """
+    Delete every selected task in one DELETE ... RETURNING,
+    scoped to the caller's tasks.
+    """
+    removed = db.execute(
+        delete(models.Task)
+        .where(*_selection_criteria(selection, user_id))
+        .returning(*EVENT_COLUMNS),
+        execution_options={"synchronize_session": False}
+    ).all()
+    db.add_all([task_event(TASK_DELETED, task) for task in removed])
+    db.commit()
+    if removed:
+        bump_tasks_generation(user_id)
+    return [task.id for task in removed]
+
+
+# must match the configuration used by models.Task.search_vector
+SEARCH_CONFIG = "english"
+
+
+def search_tasks(db: Session, user: str, q: str, page_size: int = 10, cursor: str | None = None):
+    """
+    Rank the user's tasks against a web-style query (quoted phrases, OR, -word)
+    using the GIN-indexed search_vector. Pages are keyed on (rank, id).
+    """
+    query = func.websearch_to_tsquery(cast(SEARCH_CONFIG, REGCONFIG), q)
+    rank = func.ts_rank_cd(models.Task.search_vector, query)
+    stmt = (
+        select(models.Task, rank.label("rank"))
+        .where(models.Task.user_id == user, models.Task.search_vector.bool_op("@@")(query))
+    )
+
+    if cursor:
+        try:
+            raw = _unpack_cursor(cursor)
+            seek_rank, task_id = float(raw["r"]), UUID(raw["i"])
+        except (ValueError, KeyError, TypeError) as exc:
+            raise ValueError("Invalid cursor") from exc
+        # ts_rank_cd is a real; compare as real so the rank round-trips exactly
+        stmt = stmt.where(
+            tuple_(rank, models.Task.id) < tuple_(cast(seek_rank, REAL), literal(task_id, models.Task.id.type))
+        )
+
+    rows = db.execute(
+        stmt.order_by(rank.desc(), models.Task.id.desc()).limit(page_size + 1)
+    ).all()
+    items = rows[:page_size]
+    next_cursor = None
+    if len(rows) > page_size:
+        next_cursor = _pack_cursor({"r": items[-1].rank, "i": str(items[-1].Task.id)})
+    return items, next_cursor
+
+
+EXPORT_COLUMNS = ("id", "title", "description", "status", "created_at", "updated_at")
+
+
+def stream_tasks(user_id: str, batch_size: int = 1000):
+    """
+    Yield batches of a user's task rows from a server-side cursor.
+    Uses its own session because the rows are consumed while the response
+    streams, after the request-scoped session has been released.
+    """
+    db = Session(bind=engine)
+    try:
+        result = db.execute(
+            select(*(getattr(models.Task, column) for column in EXPORT_COLUMNS))
+            .where(models.Task.user_id == user_id)
+            .order_by(models.Task.created_at.desc(), models.Task.id.desc())
+            .execution_options(yield_per=batch_size)
+        )
+        for rows in result.partitions():
+            yield rows
+    finally:
+        db.close()
+
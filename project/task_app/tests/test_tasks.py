@@ -1,6 +1,36 @@
 
+import asyncio
+import json
 import random
+import smtplib
+import ssl
 import string
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import redis
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+from sqlalchemy import func, select
+from task_app.app import stream_app
+from task_app.app.api_routes import manage_task
+from task_app.app.bg_tasks import email_tasks, outbox_relay
+from task_app.app.database_setup import models
+from task_app.app.database_setup.database import DB_MODE, SessionLocal
+from task_app.app.services_config import rbac_keycloack, redis_config
+from task_app.app.services_config.config import RATE_LIMIT, RATE_LIMIT_MODE, RATE_LIMIT_WINDOW, TASK_EVENTS_STREAM
+from task_app.app.services_config.circuit_breaker import CircuitBreaker, CircuitOpenError
+from task_app.app.services_config.local_cache import LocalCache
+from task_app.app.services_config.local_rate_limiter import LocalRateLimiter
+from task_app.app.stream_app import StreamApp
 
 def random_string(length=8):
     letters = string.ascii_letters
@@ -103,4 +133,664 @@ def test_delete_task_by_id(client):
     assert delete_response.status_code in (200, 204)
 
     get_response = client.get(f"/tasks/{task_id}")
-    assert get_response.status_code == 404   
\ No newline at end of file
+    assert get_response.status_code == 404   
+
+def test_get_tasks_by_cursor(client):
+    response = client.get("/tasks", params={"cursor": "", "page_size": 2})
+    assert response.status_code == 200
+    data = response.json()
+    assert "next_cursor" in data
+    assert "total" not in data
+    assert len(data["items"]) <= 2
+
+    if data["next_cursor"]:
+        next_response = client.get("/tasks", params={"cursor": data["next_cursor"], "page_size": 2})
+        assert next_response.status_code == 200
+        first_ids = {task["id"] for task in data["items"]}
+        assert not first_ids & {task["id"] for task in next_response.json()["items"]}
+
+
+def test_get_tasks_invalid_cursor(client):
+    response = client.get("/tasks", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_create_tasks_bulk(client):
+    existing_title = f"Task {random_string()}"
+    client.post("/tasks", json={"title": existing_title, "description": "bulk", "status": "pending"})
+
+    new_title = f"Task {random_string()}"
+    payload = [
+        {"title": new_title, "description": "bulk", "status": "pending"},
+        {"title": existing_title, "description": "bulk", "status": "pending"},
+        {"title": new_title, "description": "bulk", "status": "completed"},
+    ]
+    response = client.post("/tasks/bulk", json=payload)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 1
+    assert data["duplicates"] == 2
+    assert [result["status"] for result in data["results"]] == ["created", "duplicate", "duplicate"]
+    assert data["results"][0]["task"]["title"] == new_title
+
+
+def test_update_and_delete_tasks_bulk(client):
+    payload = [{"title": f"Task {random_string()}", "description": "bulk", "status": "pending"} for _ in range(3)]
+    create_response = client.post("/tasks/bulk", json=payload)
+    assert create_response.status_code == 200
+    task_ids = [result["task"]["id"] for result in create_response.json()["results"]]
+
+    update_response = client.patch("/tasks/bulk", json={"ids": task_ids, "status": "completed"})
+    assert update_response.status_code == 200
+    assert update_response.json()["count"] == 3
+    assert client.get(f"/tasks/{task_ids[0]}").json()["status"] == "completed"
+
+    delete_response = client.request("DELETE", "/tasks/bulk", json={"ids": task_ids})
+    assert delete_response.status_code == 200
+    assert sorted(delete_response.json()["ids"]) == sorted(task_ids)
+    assert client.get(f"/tasks/{task_ids[0]}").status_code == 404
+
+
+def test_export_tasks(client):
+    title = f"Task {random_string()}"
+    client.post("/tasks", json={"title": title, "description": "export", "status": "pending"})
+
+    response = client.get("/tasks/export")
+    assert response.status_code == 200
+    assert "application/x-ndjson" in response.headers["content-type"]
+    assert title in response.text
+
+    csv_response = client.get("/tasks/export", params={"format": "csv"})
+    assert csv_response.status_code == 200
+    assert csv_response.text.startswith("id,title,description,status,created_at,updated_at")
+
+
+def test_import_tasks(client):
+    title = f"Task {random_string()}"
+    csv_body = f"title,description,status\n{title},imported,pending\n{title},again,pending\n,missing title,pending\n"
+    response = client.post(
+        "/tasks/import",
+        files={"file": ("tasks.csv", csv_body.encode(), "text/csv")}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["received"] == 3
+    assert data["inserted"] == 1
+    assert data["duplicates"] == 1
+    assert data["invalid"] == 1
+    assert data["errors"][0]["line"] == 4
+
+
+def test_task_stats(client):
+    before = client.get("/tasks/stats").json()
+    client.post("/tasks", json={"title": f"Task {random_string()}", "status": "completed"})
+
+    response = client.get("/tasks/stats")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == before["total"] + 1
+    assert data["by_status"]["completed"] == before["by_status"]["completed"] + 1
+    assert client.get("/tasks").json()["total"] == data["total"]
+
+
+def test_list_tasks_filtered_by_status(client):
+    title = f"Task {random_string()}"
+    client.post("/tasks", json={"title": title, "status": "in_progress"})
+
+    response = client.get("/tasks", params={"status": "in_progress", "sort": "newest"})
+    assert response.status_code == 200
+    data = response.json()
+    assert all(task["status"] == "in_progress" for task in data["items"])
+    assert data["items"][0]["title"] == title
+
+    empty = client.get("/tasks", params={"created_before": "2000-01-01T00:00:00Z"})
+    assert empty.json()["total"] == 0
+
+
+def test_search_tasks(client):
+    keyword = random_string()
+    client.post("/tasks", json={"title": f"Search {keyword}", "description": "full text"})
+    client.post("/tasks", json={"title": f"Other {random_string()}", "description": f"mentions {keyword}"})
+
+    response = client.get("/tasks/search", params={"q": keyword, "page_size": 1})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["items"][0]["title"] == f"Search {keyword}"
+    assert data["next_cursor"] is not None
+
+    next_page = client.get("/tasks/search", params={"q": keyword, "page_size": 1, "cursor": data["next_cursor"]})
+    assert next_page.json()["items"][0]["description"] == f"mentions {keyword}"
+
+
+def test_list_tasks_etag(client):
+    response = client.get("/tasks")
+    etag = response.headers["ETag"]
+
+    not_modified = client.get("/tasks", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    client.post("/tasks", json={"title": f"Task {random_string()}"})
+    changed = client.get("/tasks", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_get_task_etag_unknown_id(client):
+    missing = client.get(f"/tasks/{uuid.uuid4()}", headers={"If-None-Match": "*"})
+    assert missing.status_code == 404
+
+    task_id = client.post("/tasks", json={"title": f"Task {random_string()}"}).json()["id"]
+    existing = client.get(f"/tasks/{task_id}", headers={"If-None-Match": "*"})
+    assert existing.status_code == 304
+
+
+class RecordingSMTPHandler:
+    """Accepts mail like a relay; busy@ gets a 4xx and unknown@ a 5xx at RCPT"""
+
+    def __init__(self):
+        self.delivered = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith("busy@"):
+            return "450 Mailbox busy"
+        if address.startswith("unknown@"):
+            return "550 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.delivered.append((session.peer, envelope.rcpt_tos[0]))
+        return "250 Message accepted"
+
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    handler = RecordingSMTPHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=8025)
+    controller.start()
+    # what SMTP_HOST=127.0.0.1 SMTP_PORT=8025 SMTP_USE_SSL=false resolve to when the worker starts
+    monkeypatch.setattr(email_tasks, "SMTP_HOST", "127.0.0.1")
+    monkeypatch.setattr(email_tasks, "SMTP_PORT", 8025)
+    monkeypatch.setattr(email_tasks, "SMTP_USE_SSL", False)
+    monkeypatch.setattr(email_tasks, "EMAIL_QUEUE_KEY", f"email:test:{random_string()}")
+    monkeypatch.setattr(email_tasks, "_sender", email_tasks.SMTPSender())
+    yield handler
+    email_tasks._sender.close()
+    controller.stop()
+
+
+def self_signed_context(directory):
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.now(timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name)
+        .public_key(key.public_key()).serial_number(x509.random_serial_number())
+        .not_valid_before(now).not_valid_after(now + timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    cert_file, key_file = directory / "smtp.crt", directory / "smtp.key"
+    cert_file.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    key_file.write_bytes(key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption(),
+    ))
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert_file, key_file)
+    return context
+
+
+@pytest.fixture
+def smtp_ssl_server(monkeypatch, tmp_path):
+    """Implicit TLS relay that refuses MAIL until the client has logged in, like Gmail on 465"""
+    handler = RecordingSMTPHandler()
+    handler.logins = []
+
+    def authenticator(server, session, envelope, mechanism, auth_data):
+        handler.logins.append(auth_data.login.decode())
+        return AuthResult(success=auth_data.login == b"sender@example.com" and auth_data.password == b"app-password")
+
+    controller = Controller(
+        handler, hostname="127.0.0.1", port=8465, ssl_context=self_signed_context(tmp_path),
+        # auth_require_tls only knows about STARTTLS; this socket is TLS from the first byte
+        authenticator=authenticator, auth_required=True, auth_require_tls=False,
+    )
+    controller.start()
+    monkeypatch.setattr(email_tasks, "SMTP_HOST", "127.0.0.1")
+    monkeypatch.setattr(email_tasks, "SMTP_PORT", 8465)
+    monkeypatch.setattr(email_tasks, "SMTP_USE_SSL", True)
+    monkeypatch.setattr(email_tasks, "GMAIL_USER", "sender@example.com")
+    monkeypatch.setattr(email_tasks, "GMAIL_APP_PASSWORD", "app-password")
+    monkeypatch.setattr(email_tasks, "EMAIL_QUEUE_KEY", f"email:test:{random_string()}")
+    monkeypatch.setattr(email_tasks, "_sender", email_tasks.SMTPSender())
+    yield handler
+    email_tasks._sender.close()
+    controller.stop()
+
+
+def notification(to_email):
+    return {"subject": "Task update", "body": "body", "to_email": to_email}
+
+
+def queued_recipients():
+    return [json.loads(raw)["to_email"] for raw in email_tasks.redis_client.lrange(email_tasks.EMAIL_QUEUE_KEY, 0, -1)]
+
+
+def test_flush_email_notifications(smtp_server):
+    recipients = [f"user{i}@example.com" for i in range(5)]
+    email_tasks.queue_email_notifications([notification(to_email) for to_email in recipients])
+
+    assert email_tasks.flush_email_notifications() == 5
+    assert [to_email for _, to_email in smtp_server.delivered] == recipients
+    assert len({peer for peer, _ in smtp_server.delivered}) == 1
+    assert queued_recipients() == []
+
+
+def test_flush_email_notifications_smtp_errors(smtp_server):
+    email_tasks.queue_email_notifications([
+        notification("first@example.com"),
+        notification("busy@example.com"),
+        notification("last@example.com"),
+    ])
+    with pytest.raises(smtplib.SMTPRecipientsRefused):
+        email_tasks.flush_email_notifications()
+    assert [to_email for _, to_email in smtp_server.delivered] == ["first@example.com"]
+    assert queued_recipients() == ["busy@example.com", "last@example.com"]
+
+    email_tasks.redis_client.delete(email_tasks.EMAIL_QUEUE_KEY)
+    smtp_server.delivered.clear()
+    email_tasks.queue_email_notifications([notification("unknown@example.com"), notification("last@example.com")])
+    assert email_tasks.flush_email_notifications() == 2
+    assert [to_email for _, to_email in smtp_server.delivered] == ["last@example.com"]
+    assert queued_recipients() == []
+
+
+@pytest.mark.filterwarnings("ignore:Requiring AUTH while not requiring TLS")
+def test_flush_email_notifications_ssl_login(smtp_ssl_server):
+    recipients = [f"user{i}@example.com" for i in range(3)]
+    email_tasks.queue_email_notifications([notification(to_email) for to_email in recipients])
+
+    assert email_tasks.flush_email_notifications() == 3
+    assert smtp_ssl_server.logins == ["sender@example.com"]
+    assert [to_email for _, to_email in smtp_ssl_server.delivered] == recipients
+    assert queued_recipients() == []
+
+
+def outbox_rows(task_id=None):
+    query = select(func.count()).select_from(models.TaskOutbox)
+    if task_id is not None:
+        query = query.where(models.TaskOutbox.payload["task_id"].astext == task_id)
+    with SessionLocal() as db:
+        return db.scalar(query)
+
+
+def drain_outbox():
+    with SessionLocal() as db:
+        while outbox_relay.relay_batch(db):
+            pass
+
+
+def test_outbox_relay(client, monkeypatch):
+    task_id = client.post("/tasks", json={"title": f"Task {random_string()}"}).json()["id"]
+    assert outbox_rows(task_id) == 1
+    pending = outbox_rows()
+    assert pending >= 2
+
+    def broker_down(notifications):
+        raise redis.ConnectionError("broker down")
+
+    monkeypatch.setattr(outbox_relay, "queue_email_notifications", broker_down)
+    with SessionLocal() as db, pytest.raises(redis.ConnectionError):
+        outbox_relay.relay_batch(db)
+    assert outbox_rows() == pending
+
+    queued = []
+    monkeypatch.setattr(outbox_relay, "queue_email_notifications", queued.extend)
+    drain_outbox()
+    assert outbox_rows() == 0
+    assert queued
+
+
+def consume(events, group, handler, timeout=10, **options):
+    """Run `handler` for `group` until it calls stop(), or for at most `timeout` seconds"""
+    events.consumer(group, **options)(handler)
+    watchdog = threading.Timer(timeout, events.stop)
+    watchdog.start()
+    try:
+        events.run(group, "test-consumer")
+    finally:
+        watchdog.cancel()
+
+
+def new_group(events):
+    group = f"test-{random_string()}"
+    events.ensure_group(group)
+    return group
+
+
+def test_task_events_stream(client):
+    events = StreamApp(TASK_EVENTS_STREAM)
+    group = new_group(events)
+    start_id = events.client.xinfo_stream(TASK_EVENTS_STREAM)["last-generated-id"]
+
+    task_id = client.post("/tasks", json={"title": f"Task {random_string()}"}).json()["id"]
+    client.patch(f"/tasks/{task_id}", json={"status": "completed"})
+    with SessionLocal() as db:
+        outbox_ids = db.scalars(
+            select(models.TaskOutbox.id)
+            .where(models.TaskOutbox.payload["task_id"].astext == task_id)
+            .order_by(models.TaskOutbox.id)
+        ).all()
+    drain_outbox()
+
+    seen = []
+
+    def handle(batch):
+        seen.extend(event for event in batch if event.payload["task_id"] == task_id)
+        if len(seen) == 2:
+            events.stop()
+
+    consume(events, group, handle)
+    assert [event.type for event in seen] == ["task.created", "task.updated"]
+    assert [event.outbox_id for event in seen] == outbox_ids
+    assert seen[1].payload["status"] == "completed"
+    assert events.pending(group)["pending"] == 0
+
+    replayed = StreamApp(TASK_EVENTS_STREAM)
+    replayed.replay(group, start_id)
+    again = []
+
+    def handle_again(batch):
+        again.extend(event.id for event in batch if event.payload["task_id"] == task_id)
+        if len(again) == 2:
+            replayed.stop()
+
+    consume(replayed, group, handle_again)
+    assert again == [event.id for event in seen]
+
+
+def test_task_events_failed_batch(client):
+    events = StreamApp(TASK_EVENTS_STREAM)
+    group = new_group(events)
+    client.post("/tasks", json={"title": f"Task {random_string()}"})
+    drain_outbox()
+
+    failed = []
+
+    def handler_down(batch):
+        failed.extend(event.id for event in batch)
+        events.stop()
+        raise RuntimeError("handler down")
+
+    consume(events, group, handler_down)
+    pending = events.client.xpending_range(TASK_EVENTS_STREAM, group, min="-", max="+", count=len(failed) + 1)
+    assert failed and [entry["message_id"] for entry in pending] == failed
+
+    # a restarted consumer with the same name handles its own pending entries first
+    restarted = StreamApp(TASK_EVENTS_STREAM)
+    handled = []
+
+    def handle(batch):
+        handled.extend(event.id for event in batch)
+        if len(handled) >= len(failed):
+            restarted.stop()
+
+    consume(restarted, group, handle)
+    assert handled == failed
+    assert restarted.pending(group)["pending"] == 0
+
+
+def test_task_events_dead_letter(client, monkeypatch):
+    monkeypatch.setattr(stream_app, "STREAM_CLAIM_IDLE_MS", 0)
+    monkeypatch.setattr(stream_app, "STREAM_MAX_DELIVERIES", 1)
+    monkeypatch.setattr(stream_app, "STREAM_BLOCK_MS", 100)
+    events = StreamApp(TASK_EVENTS_STREAM)
+    group = new_group(events)
+    poisoned_id = client.post("/tasks", json={"title": f"Task {random_string()}"}).json()["id"]
+    healthy_id = client.post("/tasks", json={"title": f"Task {random_string()}"}).json()["id"]
+    drain_outbox()
+
+    handled = []
+
+    def handler(batch):
+        if any(event.payload["task_id"] == poisoned_id for event in batch):
+            raise RuntimeError("cannot handle this task")
+        handled.extend(event.payload["task_id"] for event in batch)
+
+    consume(events, group, handler, timeout=2)
+    dead = [fields for _, fields in events.client.xrange(events.dead_letter) if fields["group"] == group]
+    assert [json.loads(fields["payload"])["task_id"] for fields in dead] == [poisoned_id]
+    assert healthy_id in handled and poisoned_id not in handled
+    assert events.pending(group)["pending"] == 0
+
+
+def test_stream_consumer_acks_trimmed_history():
+    events = StreamApp(f"test:events:{random_string()}")
+    group = new_group(events)
+    rows = [
+        models.TaskOutbox(id=i, event_type="task.created", payload={"task_id": str(uuid.uuid4())}, created_at=datetime.now(timezone.utc))
+        for i in range(3)
+    ]
+    entry_ids = events.publish(rows)
+    # delivered to this consumer, then trimmed before it acknowledged them
+    events.client.xreadgroup(group, "test-consumer", {events.stream: ">"})
+    events.client.xdel(events.stream, *entry_ids[:2])
+
+    handled = []
+
+    def handle(batch):
+        handled.extend(event.outbox_id for event in batch)
+        events.stop()
+
+    consume(events, group, handle, batch_size=2)
+    assert handled == [2]
+    assert events.pending(group)["pending"] == 0
+    events.client.delete(events.stream)
+
+
+def test_local_cache_skips_set_after_invalidation():
+    cache = LocalCache(maxsize=2)
+    since = cache.epoch
+    cache.delete("gen")
+    assert not cache.set("gen", "1", since=since)
+    assert cache.get("gen") is None
+
+    since = cache.epoch
+    cache.delete("other")
+    assert cache.set("gen", "2", since=since)
+    assert cache.get("gen") == "2"
+
+    # once "gen" is no longer tracked every earlier epoch is refused
+    since = cache.epoch
+    cache.delete("gen", "a", "b")
+    assert not cache.set("gen", "3", since=since)
+    assert not cache.set("c", "3", since=since)
+
+
+def test_generation_not_cached_across_invalidation(monkeypatch):
+    username = f"race-{random_string()}"
+    key = redis_config._generation_key(username)
+    monkeypatch.setattr(redis_config._invalidations_subscribed, "is_set", lambda: True)
+    call = redis_config.redis_breaker.call
+    reads = []
+
+    def read_then_bump(func, *args, **kwargs):
+        result = call(func, *args, **kwargs)
+        if not reads:
+            reads.append(result)
+            # another worker bumps and its invalidation arrives before this read is cached
+            redis_config.redis_client.incr(key)
+            redis_config._apply_invalidation(redis_config._invalidation_message([key]))
+        return result
+
+    monkeypatch.setattr(redis_config.redis_breaker, "call", read_then_bump)
+    stale = redis_config.get_tasks_generation(username)
+    assert redis_config.local_cache.get(key) is None
+    assert redis_config.get_tasks_generation(username) == str(int(stale) + 1)
+
+
+@pytest.mark.skipif(DB_MODE == "async", reason="single-flight rebuilds serve the sync routes")
+def test_list_tasks_single_flight(client, monkeypatch):
+    client.post("/tasks", json={"title": f"Task {random_string()}"})
+    loads = []
+    get_tasks = manage_task.get_tasks
+
+    def slow_get_tasks(*args, **kwargs):
+        loads.append(1)
+        time.sleep(0.2)
+        return get_tasks(*args, **kwargs)
+
+    monkeypatch.setattr(manage_task, "get_tasks", slow_get_tasks)
+    with ThreadPoolExecutor(8) as pool:
+        responses = list(pool.map(lambda _: client.get("/tasks"), range(8)))
+    assert [response.status_code for response in responses] == [200] * 8
+    assert len({response.content for response in responses}) == 1
+    assert len(loads) == 1
+
+
+def test_cache_rebuild_locked_by_another_worker(monkeypatch):
+    key = f"test:page:{random_string()}"
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return b"loaded"
+
+    redis_config.redis_client.set(f"{key}:lock", "other-worker", px=5000)
+    redis_config.cache_client.set(f"{key}:stale", b"stale")
+    assert redis_config.get_or_set_cache(key, loader) == b"stale"
+
+    # no stale copy: wait for the lock holder to store the fresh page
+    redis_config.cache_client.delete(f"{key}:stale")
+    threading.Timer(0.1, redis_config.set_cache, args=(key, b"rebuilt")).start()
+    assert redis_config.get_or_set_cache(key, loader) == b"rebuilt"
+    assert loads == []
+
+    # the lock holder never finishes: load it ourselves after CACHE_REBUILD_WAIT
+    monkeypatch.setattr(redis_config, "CACHE_REBUILD_WAIT", 0.2)
+    redis_config.redis_client.set(f"{key}:late:lock", "other-worker", px=5000)
+    assert redis_config.get_or_set_cache(f"{key}:late", loader) == b"loaded"
+    assert loads == [1]
+    assert redis_config.get_cache(f"{key}:late") == b"loaded"
+
+
+def current_username(client):
+    return rbac_keycloack.decode_access_token(client.headers["Authorization"].split()[1]).username
+
+
+def test_rate_limit_exceeded(client):
+    username = current_username(client)
+    try:
+        response = client.get("/tasks/stats")
+        assert response.headers["X-RateLimit-Limit"] == str(RATE_LIMIT)
+        remaining = int(response.headers["X-RateLimit-Remaining"])
+        # spend the rest of the budget in one call
+        assert redis_config.check_rate_limit(username, cost=remaining).allowed
+
+        limited = client.get("/tasks/stats")
+        assert limited.status_code == 429
+        assert limited.headers["X-RateLimit-Remaining"] == "0"
+        assert 1 <= int(limited.headers["X-RateLimit-Reset"]) <= RATE_LIMIT_WINDOW
+        assert limited.headers["Retry-After"] == limited.headers["X-RateLimit-Reset"]
+    finally:
+        redis_config.redis_client.delete(f"rate_limit:{RATE_LIMIT_MODE}:{username}")
+
+
+def test_sliding_window_rate_limit():
+    identity = f"limit-{random_string()}"
+    results = [redis_config.check_rate_limit(identity, limit=3, window=60, mode="sliding_window") for _ in range(4)]
+    assert [result.allowed for result in results] == [True, True, True, False]
+    assert [result.remaining for result in results] == [2, 1, 0, 0]
+    assert all(0 < result.reset_ms <= 60000 for result in results)
+
+    identity = f"limit-{random_string()}"
+    assert redis_config.check_rate_limit(identity, cost=2, limit=3, window=60, mode="sliding_window").allowed
+    denied = redis_config.check_rate_limit(identity, cost=2, limit=3, window=60, mode="sliding_window")
+    assert not denied.allowed and denied.remaining == 1
+
+
+def test_token_bucket_rate_limit():
+    identity = f"limit-{random_string()}"
+    results = [redis_config.check_rate_limit(identity, limit=2, window=1, mode="token_bucket") for _ in range(3)]
+    assert [result.allowed for result in results] == [True, True, False]
+    # one token comes back every window / limit = 500ms
+    assert 0 < results[2].reset_ms <= 500
+    time.sleep(results[2].reset_ms / 1000 + 0.05)
+    assert redis_config.check_rate_limit(identity, limit=2, window=1, mode="token_bucket").allowed
+
+
+def test_rate_limit_reloads_flushed_script(client):
+    identity = f"limit-{random_string()}"
+    redis_config.redis_client.script_flush()
+    result = redis_config.check_rate_limit(identity)
+    # the per-worker fallback would report RATE_LIMIT_FALLBACK and a one-off generation
+    assert result.allowed and result.limit == RATE_LIMIT
+    assert result.generation == redis_config.get_tasks_generation(identity)
+    assert redis_config.redis_client.script_exists(redis_config._rate_limit_scripts[RATE_LIMIT_MODE].sha) == [True]
+
+    redis_config.redis_client.script_flush()
+    response = client.get("/tasks/stats")
+    assert response.status_code == 200
+    assert response.headers["X-RateLimit-Limit"] == str(RATE_LIMIT)
+
+
+def failing_call():
+    raise ConnectionError("down")
+
+
+def test_circuit_breaker_opens_and_probes():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0.1, exceptions=(ConnectionError,))
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            breaker.call(failing_call)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "not called")
+    assert breaker.stats()["rejected"] == 1
+
+    time.sleep(0.1)
+    with pytest.raises(ConnectionError):
+        breaker.call(failing_call)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.1)
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats()["opened"] == 2
+
+
+def test_circuit_breaker_probe_without_outcome():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0, exceptions=(ConnectionError,))
+
+    async def cancelled():
+        raise asyncio.CancelledError()
+
+    async def probe():
+        with pytest.raises(asyncio.CancelledError):
+            await breaker.acall(cancelled)
+
+    with pytest.raises(ConnectionError):
+        breaker.call(failing_call)
+    asyncio.run(probe())
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(KeyError):
+        breaker.call({}.__getitem__, "missing")
+    # neither outcome counts as a failure, and the next call may probe again
+    assert breaker.stats()["failures"] == 1
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_local_rate_limiter():
+    limiter = LocalRateLimiter(maxsize=2)
+    assert limiter.check("a", 2, 3, 60)[:2] == (True, 1)
+    assert limiter.check("a", 2, 3, 60)[:2] == (False, 1)
+    allowed, remaining, reset_ms = limiter.check("a", 1, 3, 60)
+    assert (allowed, remaining) == (True, 0)
+    assert 0 < reset_ms <= 60000
+
+    # identities beyond maxsize are forgotten oldest first
+    limiter.check("b", 1, 3, 60)
+    limiter.check("c", 1, 3, 60)
+    assert limiter.check("a", 3, 3, 60)[0]